@@ -4,12 +4,15 @@ Authentication API endpoints.
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..database import get_db
 from ..schemas.user import User, UserCreate, Token
+from ..schemas._fast import from_orm_fast
 from ..services.auth_service import AuthService
 from ..utils.security import create_access_token
 from ..config import settings
+from ..utils.responses import ORJSONResponse
+from .deps import get_current_user
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
@@ -17,7 +20,7 @@ router = APIRouter(prefix="/auth", tags=["Authentication"])
 @router.post("/register", response_model=User, status_code=status.HTTP_201_CREATED)
 async def register(
     user_data: UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Register a new user.
@@ -29,13 +32,14 @@ async def register(
     Returns:
         Created user object
     """
-    return AuthService.create_user(db, user_data)
+    user = await AuthService.create_user(db, user_data)
+    return ORJSONResponse(from_orm_fast(User, user), status_code=status.HTTP_201_CREATED)
 
 
 @router.post("/login", response_model=Token)
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Login with username/email and password to get access token.
@@ -48,7 +52,7 @@ async def login(
         Access token
     """
     # Authenticate user
-    user = AuthService.authenticate_user(db, form_data.username, form_data.password)
+    user = await AuthService.authenticate_user(db, form_data.username, form_data.password)
     
     if not user:
         raise HTTPException(
@@ -80,8 +84,4 @@ async def get_current_user_info(
     Returns:
         User object
     """
-    return current_user
-
-
-# Import get_current_user from deps
-from .deps import get_current_user
+    return ORJSONResponse(from_orm_fast(User, current_user))
@@ -1,25 +1,37 @@
 """
 Contacts API endpoints for managing professor/supervisor contacts.
 """
-from typing import Optional, List
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, func
+from typing import Optional, List, Tuple
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, delete, func, tuple_
 from ..database import get_db
 from ..models.user import User
 from ..models.contact import Contact, ContactStatus
-from ..models.activity_log import ActivityLog, ActivityType
+from ..models.activity_log import ActivityType
 from ..schemas.contact import Contact as ContactSchema, ContactCreate, ContactUpdate, ContactList
-from ..api.deps import get_current_active_user
+from ..schemas._fast import response_columns
+from ..services.contact_service import ContactService
+from ..services.activity_service import ActivityService
+from ..api.deps import get_current_active_user, get_pagination_cursor, check_etag
+from ..utils.cache import count_cache, response_cache, get_shared_user_version, bump_user_version
+from ..utils.helpers import encode_cursor, escape_like
+from ..utils.responses import ORJSONResponse
 
 router = APIRouter(prefix="/contacts", tags=["Contacts"])
 
+# Total row count over the whole filtered result, ahead of LIMIT
+_window_total = func.count().over().label("_total")
+# List pages select only the fields of the response schema
+_contact_columns = response_columns(ContactSchema, Contact)
+
 
 @router.post("/", response_model=ContactSchema, status_code=status.HTTP_201_CREATED)
 async def create_contact(
     contact_data: ContactCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Create a new contact.
@@ -38,41 +50,38 @@ async def create_contact(
         user_id=current_user.id
     )
     db.add(contact)
+    await db.commit()
+    await db.refresh(contact)
+    await bump_user_version(current_user.id)
     
-    # Log activity
-    activity = ActivityLog(
+    # Log activity (batched by the background activity writer)
+    ActivityService.record(
         user_id=current_user.id,
-        contact_id=None,  # Will be set after commit
+        contact_id=contact.id,
         activity_type=ActivityType.CONTACT_CREATED,
         title=f"Created contact: {contact.name}",
         description=f"Added {contact.name} from {contact.university}"
     )
     
-    db.commit()
-    db.refresh(contact)
-    
-    # Update activity with contact_id
-    activity.contact_id = contact.id
-    db.add(activity)
-    db.commit()
-    
     return contact
 
 
-@router.get("/", response_model=ContactList)
+@router.get("/", response_model=ContactList, dependencies=[Depends(check_etag)])
 async def list_contacts(
-    page: int = Query(1, ge=1),
+    response: Response,
+    cursor: Optional[Tuple[datetime, int]] = Depends(get_pagination_cursor),
     page_size: int = Query(20, ge=1, le=100),
     status: Optional[ContactStatus] = None,
     search: Optional[str] = None,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
-    List contacts with pagination and filtering.
+    List contacts with keyset pagination and filtering.
     
     Args:
-        page: Page number (starts at 1)
+        response: Response carrying the ETag header
+        cursor: Position after which to continue (next_cursor of the previous page)
         page_size: Number of items per page
         status: Optional status filter
         search: Optional search query (searches name, email, university)
@@ -83,44 +92,66 @@ async def list_contacts(
         Paginated list of contacts
     """
     # Build query
-    query = db.query(Contact).filter(Contact.user_id == current_user.id)
+    query = select(Contact).where(Contact.user_id == current_user.id)
     
     # Apply status filter
     if status:
-        query = query.filter(Contact.status == status)
+        query = query.where(Contact.status == status)
     
-    # Apply search filter
+    # Apply search filter (single trigram-indexed column instead of an OR chain)
     if search:
-        search_pattern = f"%{search}%"
-        query = query.filter(
-            or_(
-                Contact.name.ilike(search_pattern),
-                Contact.email.ilike(search_pattern),
-                Contact.university.ilike(search_pattern),
-                Contact.research_interest.ilike(search_pattern)
-            )
+        query = query.where(
+            Contact.search_text.ilike(f"%{escape_like(search)}%", escape="\\")
         )
     
-    # Get total count
-    total = query.count()
+    # Get total count (cached per filter signature until the user's data changes)
+    version = await get_shared_user_version(current_user.id)
+    cache_key = ("contacts", current_user.id, version, status, search)
+    total = count_cache.get(cache_key)
+    if total is None and cursor:
+        # Later pages are cut by the cursor, so the window count would undercount
+        total = await db.scalar(select(func.count()).select_from(query.subquery()))
+        count_cache[cache_key] = total
     
-    # Apply pagination
-    offset = (page - 1) * page_size
-    contacts = query.order_by(Contact.created_at.desc()).offset(offset).limit(page_size).all()
+    # Apply keyset pagination (seek past the cursor instead of OFFSET)
+    if cursor:
+        query = query.where(tuple_(Contact.created_at, Contact.id) < tuple_(*cursor))
+    # On an uncached first page the total comes back with the rows (one round trip)
+    columns = _contact_columns if total is not None else [*_contact_columns, _window_total]
+    result = await db.execute(
+        query.with_only_columns(*columns)
+        .order_by(Contact.created_at.desc(), Contact.id.desc())
+        .limit(page_size + 1)
+    )
+    contacts = [dict(row) for row in result.mappings()]
+    if total is None:
+        total = contacts[0]["_total"] if contacts else 0
+        for row in contacts:
+            del row["_total"]
+        count_cache[cache_key] = total
+    
+    next_cursor = None
+    if len(contacts) > page_size:
+        contacts = contacts[:page_size]
+        next_cursor = encode_cursor(contacts[-1]["created_at"], contacts[-1]["id"])
     
-    return {
-        "total": total,
-        "contacts": contacts,
-        "page": page,
-        "page_size": page_size
-    }
+    # Plain column rows serialize straight to JSON (no ORM or schema objects)
+    return ORJSONResponse(
+        {
+            "total": total,
+            "contacts": contacts,
+            "page_size": page_size,
+            "next_cursor": next_cursor
+        },
+        headers=response.headers
+    )
 
 
 @router.get("/{contact_id}", response_model=ContactSchema)
 async def get_contact(
     contact_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get a specific contact by ID.
@@ -133,10 +164,7 @@ async def get_contact(
     Returns:
         Contact object
     """
-    contact = db.query(Contact).filter(
-        Contact.id == contact_id,
-        Contact.user_id == current_user.id
-    ).first()
+    contact = await ContactService.get_owned_contact(db, contact_id, current_user.id)
     
     if not contact:
         raise HTTPException(
@@ -152,7 +180,7 @@ async def update_contact(
     contact_id: int,
     contact_data: ContactUpdate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Update a contact.
@@ -166,10 +194,15 @@ async def update_contact(
     Returns:
         Updated contact object
     """
-    contact = db.query(Contact).filter(
-        Contact.id == contact_id,
-        Contact.user_id == current_user.id
-    ).first()
+    # Ownership check and update in one UPDATE ... RETURNING
+    update_data = contact_data.model_dump(exclude_unset=True)
+    result = await db.execute(
+        update(Contact)
+        .where(Contact.id == contact_id, Contact.user_id == current_user.id)
+        .values(**update_data)
+        .returning(Contact)
+    )
+    contact = result.scalar_one_or_none()
     
     if not contact:
         raise HTTPException(
@@ -177,23 +210,17 @@ async def update_contact(
             detail="Contact not found"
         )
     
-    # Update fields
-    update_data = contact_data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(contact, field, value)
+    await db.commit()
+    await bump_user_version(current_user.id)
     
-    # Log activity
-    activity = ActivityLog(
+    # Log activity (batched by the background activity writer)
+    ActivityService.record(
         user_id=current_user.id,
         contact_id=contact.id,
         activity_type=ActivityType.CONTACT_UPDATED,
         title=f"Updated contact: {contact.name}",
         description="Contact information updated"
     )
-    db.add(activity)
-    
-    db.commit()
-    db.refresh(contact)
     
     return contact
 
@@ -202,7 +229,7 @@ async def update_contact(
 async def delete_contact(
     contact_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Delete a contact.
@@ -212,28 +239,30 @@ async def delete_contact(
         current_user: Current authenticated user
         db: Database session
     """
-    contact = db.query(Contact).filter(
-        Contact.id == contact_id,
-        Contact.user_id == current_user.id
-    ).first()
+    # Ownership check and delete in one DELETE ... RETURNING
+    # (documents and activity logs are removed by ON DELETE CASCADE)
+    result = await db.execute(
+        delete(Contact)
+        .where(Contact.id == contact_id, Contact.user_id == current_user.id)
+        .returning(Contact.id)
+    )
     
-    if not contact:
+    if result.scalar_one_or_none() is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Contact not found"
         )
     
-    contact_name = contact.name
-    db.delete(contact)
-    db.commit()
+    await db.commit()
+    await bump_user_version(current_user.id)
     
     return None
 
 
-@router.get("/stats/summary")
+@router.get("/stats/summary", dependencies=[Depends(check_etag)])
 async def get_contact_stats(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get contact statistics summary.
@@ -245,19 +274,17 @@ async def get_contact_stats(
     Returns:
         Dictionary with contact statistics
     """
-    # Count by status
-    stats = {}
-    for status_enum in ContactStatus:
-        count = db.query(func.count(Contact.id)).filter(
-            Contact.user_id == current_user.id,
-            Contact.status == status_enum
-        ).scalar()
-        stats[status_enum.value] = count
+    cache_key = ("contact_stats", current_user.id, await get_shared_user_version(current_user.id))
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    # Count by status (single GROUP BY)
+    counts = await ContactService.count_by_status(db, current_user.id)
+    stats = {status_enum.value: count for status_enum, count in counts.items()}
     
     # Total contacts
-    total = db.query(func.count(Contact.id)).filter(
-        Contact.user_id == current_user.id
-    ).scalar()
-    stats["total"] = total
+    stats["total"] = sum(counts.values())
+    response_cache[cache_key] = stats
     
     return stats
@@ -1,10 +1,10 @@
 """
 Dashboard API endpoints for analytics and activity logs.
 """
-from typing import Optional, List
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from typing import Optional, List, Tuple
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, and_, or_, tuple_
 from datetime import datetime, timedelta
 from ..database import get_db
 from ..models.user import User
@@ -13,15 +13,25 @@ from ..models.activity_log import ActivityLog, ActivityType
 from ..models.template import Template
 from ..models.document import Document
 from ..schemas.activity_log import ActivityLog as ActivityLogSchema, ActivityLogList
-from ..api.deps import get_current_active_user
+from ..schemas._fast import response_columns
+from ..services.contact_service import ContactService
+from ..api.deps import get_current_active_user, get_pagination_cursor, check_etag
+from ..utils.cache import count_cache, response_cache, get_shared_user_version
+from ..utils.helpers import encode_cursor
+from ..utils.responses import ORJSONResponse
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
+# Total row count over the whole filtered result, ahead of LIMIT
+_window_total = func.count().over().label("_total")
+# List pages select only the fields of the response schema
+_log_columns = response_columns(ActivityLogSchema, ActivityLog)
 
-@router.get("/stats")
+
+@router.get("/stats", dependencies=[Depends(check_etag)])
 async def get_dashboard_stats(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get dashboard statistics summary.
@@ -33,53 +43,44 @@ async def get_dashboard_stats(
     Returns:
         Dashboard statistics
     """
-    # Contact statistics
-    total_contacts = db.query(func.count(Contact.id)).filter(
-        Contact.user_id == current_user.id
-    ).scalar()
-    
-    contacted = db.query(func.count(Contact.id)).filter(
-        Contact.user_id == current_user.id,
-        Contact.status.in_([ContactStatus.CONTACTED, ContactStatus.REPLIED])
-    ).scalar()
-    
-    replied = db.query(func.count(Contact.id)).filter(
-        Contact.user_id == current_user.id,
-        Contact.status == ContactStatus.REPLIED
-    ).scalar()
-    
-    pending = db.query(func.count(Contact.id)).filter(
-        Contact.user_id == current_user.id,
-        Contact.status == ContactStatus.NEW
-    ).scalar()
-    
-    follow_ups_scheduled = db.query(func.count(Contact.id)).filter(
-        Contact.user_id == current_user.id,
-        Contact.status == ContactStatus.FOLLOW_UP_SCHEDULED
-    ).scalar()
-    
-    # Recent activity (last 7 days)
-    seven_days_ago = datetime.utcnow() - timedelta(days=7)
-    recent_emails = db.query(func.count(ActivityLog.id)).filter(
-        ActivityLog.user_id == current_user.id,
-        ActivityLog.activity_type == ActivityType.EMAIL_SENT,
-        ActivityLog.created_at >= seven_days_ago
-    ).scalar()
-    
-    # Templates count
-    templates_count = db.query(func.count(Template.id)).filter(
-        Template.user_id == current_user.id
-    ).scalar()
-    
-    # Documents count
-    documents_count = db.query(func.count(Document.id)).filter(
-        Document.user_id == current_user.id
-    ).scalar()
+    cache_key = ("dash", current_user.id, await get_shared_user_version(current_user.id))
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    # Contact statistics (single GROUP BY over status)
+    counts = await ContactService.count_by_status(db, current_user.id)
+    total_contacts = sum(counts.values())
+    replied = counts[ContactStatus.REPLIED]
+    contacted = counts[ContactStatus.CONTACTED] + replied
+    pending = counts[ContactStatus.NEW]
+    follow_ups_scheduled = counts[ContactStatus.FOLLOW_UP_SCHEDULED]
+    
+    # Recent activity (last 7 days) plus template/document counts in one round-trip;
+    # time-based bounds derive from one timestamp, as in get_upcoming_followups
+    now = datetime.utcnow()
+    seven_days_ago = now - timedelta(days=7)
+    result = await db.execute(
+        select(
+            select(func.count(ActivityLog.id)).where(
+                ActivityLog.user_id == current_user.id,
+                ActivityLog.activity_type == ActivityType.EMAIL_SENT,
+                ActivityLog.created_at >= seven_days_ago
+            ).scalar_subquery(),
+            select(func.count(Template.id)).where(
+                Template.user_id == current_user.id
+            ).scalar_subquery(),
+            select(func.count(Document.id)).where(
+                Document.user_id == current_user.id
+            ).scalar_subquery()
+        )
+    )
+    recent_emails, templates_count, documents_count = result.one()
     
     # Response rate
     response_rate = (replied / contacted * 100) if contacted > 0 else 0
     
-    return {
+    stats = {
         "contacts": {
             "total": total_contacts,
             "contacted": contacted,
@@ -96,22 +97,27 @@ async def get_dashboard_stats(
             "documents": documents_count
         }
     }
+    response_cache[cache_key] = stats
+    
+    return stats
 
 
-@router.get("/activity", response_model=ActivityLogList)
+@router.get("/activity", response_model=ActivityLogList, dependencies=[Depends(check_etag)])
 async def get_activity_logs(
-    page: int = Query(1, ge=1),
+    response: Response,
+    cursor: Optional[Tuple[datetime, int]] = Depends(get_pagination_cursor),
     page_size: int = Query(20, ge=1, le=100),
     activity_type: Optional[ActivityType] = None,
     contact_id: Optional[int] = None,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
-    Get activity logs with pagination and filtering.
+    Get activity logs with keyset pagination and filtering.
     
     Args:
-        page: Page number
+        response: Response carrying the ETag header
+        cursor: Position after which to continue (next_cursor of the previous page)
         page_size: Items per page
         activity_type: Optional filter by activity type
         contact_id: Optional filter by contact
@@ -121,31 +127,59 @@ async def get_activity_logs(
     Returns:
         Paginated activity logs
     """
-    query = db.query(ActivityLog).filter(ActivityLog.user_id == current_user.id)
+    query = select(ActivityLog).where(ActivityLog.user_id == current_user.id)
     
     if activity_type:
-        query = query.filter(ActivityLog.activity_type == activity_type)
+        query = query.where(ActivityLog.activity_type == activity_type)
     
     if contact_id:
-        query = query.filter(ActivityLog.contact_id == contact_id)
+        query = query.where(ActivityLog.contact_id == contact_id)
     
-    total = query.count()
+    version = await get_shared_user_version(current_user.id)
+    cache_key = ("activity", current_user.id, version, activity_type, contact_id)
+    total = count_cache.get(cache_key)
+    if total is None and cursor:
+        # Later pages are cut by the cursor, so the window count would undercount
+        total = await db.scalar(select(func.count()).select_from(query.subquery()))
+        count_cache[cache_key] = total
     
-    offset = (page - 1) * page_size
-    logs = query.order_by(ActivityLog.created_at.desc()).offset(offset).limit(page_size).all()
+    if cursor:
+        query = query.where(tuple_(ActivityLog.created_at, ActivityLog.id) < tuple_(*cursor))
+    # On an uncached first page the total comes back with the rows (one round trip)
+    columns = _log_columns if total is not None else [*_log_columns, _window_total]
+    result = await db.execute(
+        query.with_only_columns(*columns)
+        .order_by(ActivityLog.created_at.desc(), ActivityLog.id.desc())
+        .limit(page_size + 1)
+    )
+    logs = [dict(row) for row in result.mappings()]
+    if total is None:
+        total = logs[0]["_total"] if logs else 0
+        for row in logs:
+            del row["_total"]
+        count_cache[cache_key] = total
     
-    return {
-        "total": total,
-        "logs": logs,
-        "page": page,
-        "page_size": page_size
-    }
+    next_cursor = None
+    if len(logs) > page_size:
+        logs = logs[:page_size]
+        next_cursor = encode_cursor(logs[-1]["created_at"], logs[-1]["id"])
+    
+    # Plain column rows serialize straight to JSON (no ORM or schema objects)
+    return ORJSONResponse(
+        {
+            "total": total,
+            "logs": logs,
+            "page_size": page_size,
+            "next_cursor": next_cursor
+        },
+        headers=response.headers
+    )
 
 
-@router.get("/pipeline")
+@router.get("/pipeline", dependencies=[Depends(check_etag)])
 async def get_pipeline_overview(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get outreach pipeline overview.
@@ -157,19 +191,40 @@ async def get_pipeline_overview(
     Returns:
         Pipeline stages with contact counts
     """
+    cache_key = ("pipeline", current_user.id, await get_shared_user_version(current_user.id))
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    counts = await ContactService.count_by_status(db, current_user.id)
+    
+    samples = {status: [] for status in ContactStatus}
+    
+    # Get up to 5 most recently updated sample contacts per stage in one query
+    # (skipped for users with no contacts, e.g. first-time users)
+    if any(counts.values()):
+        ranked = select(
+            Contact.id,
+            Contact.name,
+            Contact.university,
+            Contact.last_contacted_at,
+            Contact.status,
+            func.row_number().over(
+                partition_by=Contact.status,
+                order_by=Contact.updated_at.desc()
+            ).label("rn")
+        ).where(Contact.user_id == current_user.id).subquery()
+        result = await db.execute(
+            select(ranked).where(ranked.c.rn <= 5).order_by(ranked.c.rn)
+        )
+        for row in result.all():
+            samples[row.status].append(row)
+    
     pipeline = []
     
     for status in ContactStatus:
-        count = db.query(func.count(Contact.id)).filter(
-            Contact.user_id == current_user.id,
-            Contact.status == status
-        ).scalar()
-        
-        # Get sample contacts for this stage
-        contacts = db.query(Contact).filter(
-            Contact.user_id == current_user.id,
-            Contact.status == status
-        ).order_by(Contact.updated_at.desc()).limit(5).all()
+        count = counts[status]
+        contacts = samples[status]
         
         pipeline.append({
             "status": status.value,
@@ -179,22 +234,25 @@ async def get_pipeline_overview(
                     "id": c.id,
                     "name": c.name,
                     "university": c.university,
-                    "last_contacted": c.last_contacted_at.isoformat() if c.last_contacted_at else None
+                    "last_contacted": c.last_contacted_at
                 }
                 for c in contacts
             ]
         })
     
-    return {
+    overview = {
         "pipeline": pipeline
     }
+    response_cache[cache_key] = overview
+    
+    return overview
 
 
 @router.get("/upcoming-followups")
 async def get_upcoming_followups(
     days: int = Query(7, ge=1, le=30),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get upcoming follow-ups within specified days.
@@ -207,14 +265,26 @@ async def get_upcoming_followups(
     Returns:
         List of upcoming follow-ups
     """
-    future_date = datetime.utcnow() + timedelta(days=days)
+    # One timestamp for both bounds (consistent window, single bind value)
+    now = datetime.utcnow()
+    future_date = now + timedelta(days=days)
     
-    followups = db.query(Contact).filter(
-        Contact.user_id == current_user.id,
-        Contact.follow_up_date.isnot(None),
-        Contact.follow_up_date <= future_date,
-        Contact.follow_up_date >= datetime.utcnow()
-    ).order_by(Contact.follow_up_date.asc()).all()
+    # Select only the projected columns (plain rows, no ORM hydration)
+    result = await db.execute(
+        select(
+            Contact.id,
+            Contact.name,
+            Contact.email,
+            Contact.university,
+            Contact.follow_up_date,
+            Contact.status
+        ).where(
+            Contact.user_id == current_user.id,
+            Contact.follow_up_date >= now,
+            Contact.follow_up_date <= future_date
+        ).order_by(Contact.follow_up_date.asc())
+    )
+    followups = result.all()
     
     return {
         "count": len(followups),
@@ -224,7 +294,7 @@ async def get_upcoming_followups(
                 "name": c.name,
                 "email": c.email,
                 "university": c.university,
-                "follow_up_date": c.follow_up_date.isoformat(),
+                "follow_up_date": c.follow_up_date,
                 "status": c.status.value
             }
             for c in followups
@@ -1,24 +1,45 @@
 """
 API dependencies for authentication and database access.
 """
-from typing import Optional
-from fastapi import Depends, HTTPException, status
+import hashlib
+import logging
+import time
+from typing import AsyncIterator, Optional, Tuple
+from datetime import datetime
+import orjson
+from fastapi import Depends, Header, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError
 from ..database import get_db
 from ..models.user import User
+from ..models.tenant import scope_session_to_user
 from ..services.auth_service import AuthService
 from ..utils.security import decode_access_token
+from ..utils.helpers import decode_cursor
+from ..utils.cache import user_cache, get_shared_user_version, get_user_auth_version
+from ..utils.redis_client import get_redis, report_redis_error
+from ..config import settings
 from ..schemas.user import TokenData
 
+logger = logging.getLogger(__name__)
+
 # OAuth2 scheme for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
+# ETags also roll over on this interval, bounding staleness from changes the
+# user version does not see (time-based counts, writes while Redis is down)
+ETAG_WINDOW_SECONDS = 60
+
+# How long a completed response is replayed for a repeated Idempotency-Key
+IDEMPOTENCY_TTL_SECONDS = 24 * 60 * 60
+_IDEMPOTENCY_PENDING = b"pending"
+
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> User:
     """
     Get current authenticated user from JWT token.
@@ -50,10 +71,21 @@ async def get_current_user(
     if username is None or user_id is None:
         raise credentials_exception
     
-    # Get user from database
-    user = AuthService.get_user_by_id(db, user_id)
+    # Get user from the short-lived cache, falling back to the database. The
+    # key includes the shared account version so an update made through any
+    # worker evicts it everywhere; without Redis the cache is bypassed.
+    auth_version = await get_user_auth_version(user_id)
+    cache_key = (user_id, auth_version)
+    user = user_cache.get(cache_key) if auth_version is not None else None
     if user is None:
-        raise credentials_exception
+        user = await AuthService.get_user_by_id(db, user_id)
+        if user is None:
+            raise credentials_exception
+        
+        # Detach so the shared instance is unaffected by this request's session
+        db.expunge(user)
+        if auth_version is not None:
+            user_cache[cache_key] = user
     
     if not user.is_active:
         raise HTTPException(
@@ -61,6 +93,9 @@ async def get_current_user(
             detail="Inactive user"
         )
     
+    # Limit every ORM query on this request's session to the user's own rows
+    scope_session_to_user(db, user.id)
+    
     return user
 
 
@@ -85,3 +120,187 @@ async def get_current_active_user(
             detail="Inactive user"
         )
     return current_user
+
+
+def get_pagination_cursor(cursor: Optional[str] = None) -> Optional[Tuple[datetime, int]]:
+    """
+    Decode the keyset pagination cursor query parameter.
+    
+    Args:
+        cursor: Opaque cursor returned as next_cursor by a list endpoint
+        
+    Returns:
+        Tuple of (created_at, id) to seek past, or None for the first page
+        
+    Raises:
+        HTTPException: If the cursor is malformed
+    """
+    if cursor is None:
+        return None
+    
+    position = decode_cursor(cursor)
+    if position is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+    return position
+
+
+async def check_etag(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_active_user)
+) -> None:
+    """
+    Answer conditional GETs with 304 while the user's data is unchanged.
+    
+    The ETag is derived from the user's data version, the request path and
+    query string, and the current time window.
+    
+    Args:
+        request: Incoming request
+        response: Response whose headers receive the ETag
+        current_user: Current authenticated user
+        
+    Raises:
+        HTTPException: 304 Not Modified if If-None-Match matches
+    """
+    window = int(time.time()) // ETAG_WINDOW_SECONDS
+    version = await get_shared_user_version(current_user.id)
+    key = f"{current_user.id}:{version}:{window}:{request.url.path}?{request.url.query}"
+    etag = f'W/"{hashlib.blake2b(key.encode(), digest_size=8).hexdigest()}"'
+    
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip() for tag in if_none_match.split(",")):
+        raise HTTPException(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag}
+        )
+    
+    response.headers["ETag"] = etag
+
+
+async def rate_limit(
+    request: Request,
+    current_user: User = Depends(get_current_active_user)
+) -> None:
+    """
+    Enforce RATE_LIMIT_PER_MINUTE per user and endpoint (fixed window in Redis).
+    
+    If Redis is unavailable the request is allowed.
+    
+    Args:
+        request: Incoming request
+        current_user: Current authenticated user
+        
+    Raises:
+        HTTPException: 429 Too Many Requests when the limit is exceeded
+    """
+    window = int(time.time()) // 60
+    key = f"ratelimit:{current_user.id}:{request.url.path}:{window}"
+    try:
+        async with get_redis().pipeline(transaction=True) as pipe:
+            count, _ = await pipe.incr(key).expire(key, 60).execute()
+    except RedisError as e:
+        report_redis_error(logger, "Rate limiting skipped, Redis unavailable", e)
+        return
+    
+    if count > settings.RATE_LIMIT_PER_MINUTE:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded, try again later",
+            headers={"Retry-After": str(60 - int(time.time()) % 60)}
+        )
+
+
+class IdempotencyGuard:
+    """Replays or records the response for a request's Idempotency-Key."""
+    
+    def __init__(self, key: Optional[str] = None, cached_response: Optional[Response] = None):
+        self.key = key
+        self.cached_response = cached_response
+        self.saved = False
+    
+    async def save(self, response: Response) -> None:
+        """
+        Store a completed response for replay to retries with the same key.
+        
+        Args:
+            response: Response returned by the endpoint
+        """
+        if self.key is None:
+            return
+        payload = orjson.dumps({
+            "status_code": response.status_code,
+            "body": response.body.decode()
+        })
+        try:
+            await get_redis().set(self.key, payload, ex=IDEMPOTENCY_TTL_SECONDS)
+            self.saved = True
+        except RedisError as e:
+            report_redis_error(logger, "Failed to store idempotent response", e)
+
+
+async def get_idempotency_guard(
+    request: Request,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    current_user: User = Depends(get_current_active_user)
+) -> AsyncIterator[IdempotencyGuard]:
+    """
+    Deduplicate retried requests that carry an Idempotency-Key header.
+    
+    The first request claims the key; a retry after it completed gets the
+    stored response (guard.cached_response). If the first request fails
+    without saving, the key is released so the client can retry. Without
+    the header, or if Redis is unavailable, requests run normally.
+    
+    Args:
+        request: Incoming request
+        idempotency_key: Client-chosen key for this logical operation
+        current_user: Current authenticated user
+        
+    Yields:
+        IdempotencyGuard for the endpoint to check and save through
+        
+    Raises:
+        HTTPException: 409 Conflict if the same key is still being processed
+    """
+    if not idempotency_key:
+        yield IdempotencyGuard()
+        return
+    
+    key = f"idempotency:{current_user.id}:{request.url.path}:{idempotency_key}"
+    try:
+        redis = get_redis()
+        claimed = await redis.set(key, _IDEMPOTENCY_PENDING, nx=True, ex=IDEMPOTENCY_TTL_SECONDS)
+        stored = None if claimed else await redis.get(key)
+    except RedisError as e:
+        report_redis_error(logger, "Idempotency check skipped, Redis unavailable", e)
+        yield IdempotencyGuard()
+        return
+    
+    if not claimed and stored is not None:
+        if stored == _IDEMPOTENCY_PENDING:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still in progress"
+            )
+        cached = orjson.loads(stored)
+        yield IdempotencyGuard(cached_response=Response(
+            content=cached["body"],
+            status_code=cached["status_code"],
+            media_type="application/json",
+            headers={"Idempotent-Replayed": "true"}
+        ))
+        return
+    
+    guard = IdempotencyGuard(key=key)
+    try:
+        yield guard
+    finally:
+        if not guard.saved:
+            try:
+                await redis.delete(key)
+            except RedisError as e:
+                report_redis_error(logger, "Failed to release idempotency key", e)
@@ -1,20 +1,67 @@
 """
 Documents API endpoints for file upload and management.
 """
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
+from typing import Callable, Optional, Tuple
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Request, status, UploadFile, File, Form, Query
+from fastapi.responses import FileResponse, Response
+from fastapi.routing import APIRoute
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..config import settings
 from ..database import get_db
 from ..models.user import User
 from ..models.document import Document
-from ..models.activity_log import ActivityLog, ActivityType
-from ..schemas.document import Document as DocumentSchema, DocumentUploadResponse
+from ..models.activity_log import ActivityType
+from ..schemas.document import Document as DocumentSchema, DocumentList, DocumentUploadResponse
 from ..services.file_service import FileService
-from ..api.deps import get_current_active_user
+from ..services.activity_service import ActivityService
+from ..api.deps import get_current_active_user, get_pagination_cursor
+from ..utils.cache import bump_user_version
+from ..utils.helpers import encode_cursor
+from ..utils.responses import ORJSONResponse
 import os
+from urllib.parse import quote
 
-router = APIRouter(prefix="/documents", tags=["Documents"])
+# Room for multipart boundaries, part headers and the small form fields
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadSizeLimitRoute(APIRoute):
+    """
+    Route that rejects bodies declared larger than the upload limit.
+    
+    The check runs on the Content-Length header before FastAPI parses the
+    multipart body, so oversized uploads are refused without being spooled
+    to disk. Chunked requests are still capped while the file is saved.
+    """
+    
+    def get_route_handler(self) -> Callable:
+        route_handler = super().get_route_handler()
+        
+        async def size_limited_route_handler(request: Request) -> Response:
+            content_length = request.headers.get("content-length", "")
+            if content_length.isdigit() and int(content_length) > settings.MAX_UPLOAD_SIZE + MULTIPART_OVERHEAD:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"File too large. Maximum size: {settings.MAX_UPLOAD_SIZE} bytes"
+                )
+            return await route_handler(request)
+        
+        return size_limited_route_handler
+
+
+router = APIRouter(prefix="/documents", tags=["Documents"], route_class=UploadSizeLimitRoute)
+
+
+# Document columns read as plain rows and serialized without ORM objects or
+# response model validation
+_document_columns = [getattr(Document, column.key) for column in Document.__table__.columns]
+
+
+class LargeChunkFileResponse(FileResponse):
+    """FileResponse that streams in 1 MiB chunks instead of the 64 KiB default."""
+    chunk_size = 1024 * 1024
 
 
 @router.post("/upload", response_model=DocumentUploadResponse, status_code=status.HTTP_201_CREATED)
@@ -23,7 +70,7 @@ async def upload_document(
     contact_id: Optional[int] = Form(None),
     description: Optional[str] = Form(None),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Upload a document file.
@@ -38,7 +85,7 @@ async def upload_document(
     Returns:
         Uploaded document information
     """
-    # Upload file
+    # Upload file (document row is flushed, committed below)
     document = await FileService.upload_document(
         db=db,
         user=current_user,
@@ -47,59 +94,81 @@ async def upload_document(
         description=description
     )
     
-    # Log activity
-    activity = ActivityLog(
+    await db.commit()
+    await bump_user_version(current_user.id)
+    
+    # Log activity (batched by the background activity writer)
+    ActivityService.record(
         user_id=current_user.id,
         contact_id=contact_id,
         activity_type=ActivityType.DOCUMENT_UPLOADED,
         title=f"Uploaded document: {document.original_filename}",
         description=f"File size: {document.file_size} bytes"
     )
-    db.add(activity)
-    db.commit()
     
-    return {
-        "id": document.id,
-        "filename": document.filename,
-        "original_filename": document.original_filename,
-        "file_size": document.file_size,
-        "file_type": document.file_type,
-        "message": "File uploaded successfully"
-    }
+    return ORJSONResponse(
+        status_code=status.HTTP_201_CREATED,
+        content={
+            "id": document.id,
+            "filename": document.filename,
+            "original_filename": document.original_filename,
+            "file_size": document.file_size,
+            "file_type": document.file_type,
+            "message": "File uploaded successfully"
+        }
+    )
 
 
-@router.get("/", response_model=List[DocumentSchema])
+@router.get("/", response_model=DocumentList)
 async def list_documents(
+    cursor: Optional[Tuple[datetime, int]] = Depends(get_pagination_cursor),
+    page_size: int = Query(50, ge=1, le=200),
     contact_id: Optional[int] = None,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
-    List documents for current user.
+    List documents for current user with keyset pagination.
     
     Args:
+        cursor: Position after which to continue (next_cursor of the previous page)
+        page_size: Number of items per page
         contact_id: Optional filter by contact ID
         current_user: Current authenticated user
         db: Database session
         
     Returns:
-        List of documents
+        Paginated list of documents
     """
-    query = db.query(Document).filter(Document.user_id == current_user.id)
+    query = select(*_document_columns).where(Document.user_id == current_user.id)
     
     if contact_id:
-        query = query.filter(Document.contact_id == contact_id)
+        query = query.where(Document.contact_id == contact_id)
     
-    documents = query.order_by(Document.created_at.desc()).all()
+    if cursor:
+        query = query.where(tuple_(Document.created_at, Document.id) < tuple_(*cursor))
+    result = await db.execute(
+        query.order_by(Document.created_at.desc(), Document.id.desc()).limit(page_size + 1)
+    )
+    documents = [dict(row) for row in result.mappings()]
     
-    return documents
+    next_cursor = None
+    if len(documents) > page_size:
+        documents = documents[:page_size]
+        next_cursor = encode_cursor(documents[-1]["created_at"], documents[-1]["id"])
+    
+    return ORJSONResponse({
+        "documents": documents,
+        "page_size": page_size,
+        "next_cursor": next_cursor
+    })
 
 
 @router.get("/{document_id}", response_model=DocumentSchema)
 async def get_document(
     document_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get document information.
@@ -112,10 +181,13 @@ async def get_document(
     Returns:
         Document object
     """
-    document = db.query(Document).filter(
-        Document.id == document_id,
-        Document.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(*_document_columns).where(
+            Document.id == document_id,
+            Document.user_id == current_user.id
+        )
+    )
+    document = result.mappings().one_or_none()
     
     if not document:
         raise HTTPException(
@@ -123,14 +195,14 @@ async def get_document(
             detail="Document not found"
         )
     
-    return document
+    return ORJSONResponse(dict(document))
 
 
 @router.get("/{document_id}/download")
 async def download_document(
     document_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Download a document file.
@@ -143,10 +215,13 @@ async def download_document(
     Returns:
         File response
     """
-    document = db.query(Document).filter(
-        Document.id == document_id,
-        Document.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Document).where(
+            Document.id == document_id,
+            Document.user_id == current_user.id
+        )
+    )
+    document = result.scalar_one_or_none()
     
     if not document:
         raise HTTPException(
@@ -154,16 +229,30 @@ async def download_document(
             detail="Document not found"
         )
     
-    if not FileService.document_exists(document):
+    # One stat, reused by FileResponse for Content-Length/ETag headers
+    stat_result = FileService.stat_document(document)
+    if stat_result is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="File not found on server"
         )
     
-    return FileResponse(
+    # Behind nginx, hand the transfer off to the proxy (sendfile, no app buffering)
+    if settings.DOWNLOAD_ACCEL_REDIRECT_PREFIX:
+        relative_path = os.path.relpath(document.file_path, settings.UPLOAD_DIR).replace(os.sep, "/")
+        return Response(
+            media_type=document.mime_type,
+            headers={
+                "X-Accel-Redirect": f"{settings.DOWNLOAD_ACCEL_REDIRECT_PREFIX.rstrip('/')}/{quote(relative_path)}",
+                "Content-Disposition": f"attachment; filename*=utf-8''{quote(document.original_filename)}"
+            }
+        )
+    
+    return LargeChunkFileResponse(
         path=document.file_path,
         filename=document.original_filename,
-        media_type=document.mime_type
+        media_type=document.mime_type,
+        stat_result=stat_result
     )
 
 
@@ -171,7 +260,7 @@ async def download_document(
 async def delete_document(
     document_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Delete a document.
@@ -181,23 +270,19 @@ async def delete_document(
         current_user: Current authenticated user
         db: Database session
     """
-    document = db.query(Document).filter(
-        Document.id == document_id,
-        Document.user_id == current_user.id
-    ).first()
+    success = await FileService.delete_document(db, document_id, current_user.id)
     
-    if not document:
+    if success is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Document not found"
         )
     
-    success = FileService.delete_document(db, document)
-    
     if not success:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to delete document"
         )
+    await bump_user_version(current_user.id)
     
     return None
@@ -3,18 +3,22 @@ Email API endpoints for sending and managing emails.
 """
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
-from sqlalchemy.orm import Session
+from sqlalchemy import select, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, EmailStr
 from datetime import datetime
-from ..database import get_db
+from ..database import get_db, AsyncSessionLocal
 from ..models.user import User
 from ..models.contact import Contact, ContactStatus
 from ..models.template import Template
 from ..models.activity_log import ActivityLog, ActivityType
 from ..services.email_service import EmailService
 from ..services.llm_service import LLMService
+from ..services.contact_service import ContactService
 from ..services.scheduler_service import SchedulerService
-from ..api.deps import get_current_active_user
+from ..api.deps import get_current_active_user, rate_limit, IdempotencyGuard, get_idempotency_guard
+from ..utils.cache import bump_user_version
+from ..utils.responses import ORJSONResponse
 
 router = APIRouter(prefix="/email", tags=["Email"])
 
@@ -42,41 +46,117 @@ class ScheduleFollowupRequest(BaseModel):
     template_id: Optional[int] = None
 
 
-@router.post("/send")
+async def _deliver_email(
+    user_id: int,
+    contact_id: int,
+    template_id: int,
+    subject: str,
+    body: str
+):
+    """
+    Send a personalized email and record the outcome (background task).
+    
+    Runs after the response has been sent, so it opens its own sessions
+    instead of using the request-scoped one. No session is held during the
+    SMTP send, so a slow server does not tie up pooled connections.
+    
+    Args:
+        user_id: Sending user ID
+        contact_id: Recipient contact ID
+        template_id: Template the email was built from
+        subject: Personalized subject
+        body: Personalized body
+    """
+    async with AsyncSessionLocal() as db:
+        contact = await ContactService.get_owned_contact(db, contact_id, user_id)
+        if not contact:
+            return
+        contact_email, contact_name = contact.email, contact.name
+    
+    # Send email
+    success = await EmailService.send_email_smtp(
+        to_email=contact_email,
+        subject=subject,
+        body=body
+    )
+    
+    async with AsyncSessionLocal() as db:
+        if success:
+            # Update contact status
+            await db.execute(
+                update(Contact)
+                .where(Contact.id == contact_id, Contact.user_id == user_id)
+                .values(last_contacted_at=datetime.utcnow(), status=ContactStatus.CONTACTED)
+            )
+            
+            # Log success
+            activity = ActivityLog(
+                user_id=user_id,
+                contact_id=contact_id,
+                activity_type=ActivityType.EMAIL_SENT,
+                title=f"Email sent to {contact_name}",
+                description=f"Subject: {subject}",
+                meta={"template_id": template_id}
+            )
+        else:
+            # Log failure
+            activity = ActivityLog(
+                user_id=user_id,
+                contact_id=contact_id,
+                activity_type=ActivityType.EMAIL_FAILED,
+                title=f"Failed to send email to {contact_name}",
+                description=f"Subject: {subject}"
+            )
+        db.add(activity)
+        await db.commit()
+    
+    await bump_user_version(user_id)
+
+
+@router.post("/send", status_code=status.HTTP_202_ACCEPTED, dependencies=[Depends(rate_limit)])
 async def send_email(
     email_request: SendEmailRequest,
     background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    idempotency: IdempotencyGuard = Depends(get_idempotency_guard),
+    db: AsyncSession = Depends(get_db)
 ):
     """
-    Send a personalized email to a single contact.
+    Personalize an email for a single contact and queue it for sending.
+    
+    Delivery happens in a background task after the response is returned;
+    the outcome is recorded in the activity log. Retries carrying the same
+    Idempotency-Key header get the original response without re-sending.
     
     Args:
         email_request: Email send request
         background_tasks: FastAPI background tasks
         current_user: Current authenticated user
+        idempotency: Idempotency-Key replay guard
         db: Database session
         
     Returns:
-        Success message with email details
+        Queued message with email details
     """
-    # Get template and contact
-    template = db.query(Template).filter(
-        Template.id == email_request.template_id,
-        Template.user_id == current_user.id
-    ).first()
+    if idempotency.cached_response is not None:
+        return idempotency.cached_response
+    
+    # Get template and contact in one round trip (contact is None if not found;
+    # both are scoped to the current user by the session)
+    result = await db.execute(
+        select(Template, Contact)
+        .outerjoin(Contact, Contact.id == email_request.contact_id)
+        .where(Template.id == email_request.template_id)
+    )
+    row = result.first()
     
-    if not template:
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Template not found"
         )
     
-    contact = db.query(Contact).filter(
-        Contact.id == email_request.contact_id,
-        Contact.user_id == current_user.id
-    ).first()
+    template, contact = row
     
     if not contact:
         raise HTTPException(
@@ -92,90 +172,75 @@ async def send_email(
         additional_context=email_request.additional_context
     )
     
-    # Send email
-    success = await EmailService.send_email_smtp(
-        to_email=contact.email,
+    # Send email and log the outcome after responding
+    background_tasks.add_task(
+        _deliver_email,
+        user_id=current_user.id,
+        contact_id=contact.id,
+        template_id=template.id,
         subject=personalized["subject"],
         body=personalized["body"]
     )
     
-    if not success:
-        # Log failure
-        activity = ActivityLog(
-            user_id=current_user.id,
-            contact_id=contact.id,
-            activity_type=ActivityType.EMAIL_FAILED,
-            title=f"Failed to send email to {contact.name}",
-            description=f"Subject: {personalized['subject']}"
-        )
-        db.add(activity)
-        db.commit()
-        
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to send email"
-        )
-    
-    # Update contact status
-    contact.last_contacted_at = datetime.utcnow()
-    contact.status = ContactStatus.CONTACTED
-    
-    # Log success
-    activity = ActivityLog(
-        user_id=current_user.id,
-        contact_id=contact.id,
-        activity_type=ActivityType.EMAIL_SENT,
-        title=f"Email sent to {contact.name}",
-        description=f"Subject: {personalized['subject']}",
-        metadata={"template_id": template.id}
+    # Fixed-shape payload: serialize directly, skipping jsonable_encoder
+    response = ORJSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={
+            "success": True,
+            "status": "queued",
+            "message": f"Email to {contact.name} queued for sending",
+            "contact_email": contact.email,
+            "subject": personalized["subject"]
+        }
     )
-    db.add(activity)
-    db.commit()
-    
-    return {
-        "success": True,
-        "message": f"Email sent successfully to {contact.name}",
-        "contact_email": contact.email,
-        "subject": personalized["subject"]
-    }
+    await idempotency.save(response)
+    return response
 
 
-@router.post("/batch")
+@router.post("/batch", dependencies=[Depends(rate_limit)])
 async def send_batch_emails(
     batch_request: BatchEmailRequest,
     background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    idempotency: IdempotencyGuard = Depends(get_idempotency_guard),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Send personalized emails to multiple contacts.
     
+    Retries carrying the same Idempotency-Key header get the original
+    results without re-sending.
+    
     Args:
         batch_request: Batch email request
         background_tasks: FastAPI background tasks
         current_user: Current authenticated user
+        idempotency: Idempotency-Key replay guard
         db: Database session
         
     Returns:
         Batch send results
     """
-    # Get template
-    template = db.query(Template).filter(
-        Template.id == batch_request.template_id,
-        Template.user_id == current_user.id
-    ).first()
+    if idempotency.cached_response is not None:
+        return idempotency.cached_response
     
-    if not template:
+    # Get template and contacts in one round trip
+    result = await db.execute(
+        select(Template, Contact)
+        .outerjoin(Contact, Contact.id.in_(batch_request.contact_ids))
+        .where(Template.id == batch_request.template_id)
+    )
+    rows = result.all()
+    
+    if not rows:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Template not found"
         )
     
-    # Get contacts
-    contacts = db.query(Contact).filter(
-        Contact.id.in_(batch_request.contact_ids),
-        Contact.user_id == current_user.id
-    ).all()
+    template = rows[0][0]
+    contacts = [contact for _, contact in rows if contact is not None]
+    contact_map = {contact.id: contact for contact in contacts}
     
     if len(contacts) != len(batch_request.contact_ids):
         raise HTTPException(
@@ -183,14 +248,20 @@ async def send_batch_emails(
             detail="One or more contacts not found"
         )
     
+    # End the read transaction so no connection or snapshot is held across
+    # the LLM and SMTP round trips below (loaded objects stay usable)
+    await db.commit()
+    
+    # Personalize for all contacts concurrently, bounded against the LLM provider
+    personalized_list = await LLMService.personalize_batch(
+        template=template,
+        contacts=contacts,
+        use_ai=batch_request.use_ai
+    )
+    
     # Prepare recipients list
     recipients = []
-    for contact in contacts:
-        personalized = await LLMService.personalize_template(
-            template=template,
-            contact=contact,
-            use_ai=batch_request.use_ai
-        )
+    for contact, personalized in zip(contacts, personalized_list):
         recipients.append({
             "email": contact.email,
             "subject": personalized["subject"],
@@ -207,44 +278,62 @@ async def send_batch_emails(
         delay_seconds=batch_request.delay_seconds
     )
     
-    # Update contacts and log activities
+    # Collect contact updates and activity rows
+    now = datetime.utcnow()
+    failed_emails = set(results["failed_emails"])
+    sent_contact_ids = []
+    activities = []
     for recipient in recipients:
-        contact = db.query(Contact).filter(Contact.id == recipient["contact_id"]).first()
-        if recipient["email"] not in results["failed_emails"]:
-            contact.last_contacted_at = datetime.utcnow()
-            contact.status = ContactStatus.CONTACTED
-            
-            activity = ActivityLog(
-                user_id=current_user.id,
-                contact_id=contact.id,
-                activity_type=ActivityType.EMAIL_SENT,
-                title=f"Batch email sent to {contact.name}",
-                description=f"Subject: {recipient['subject']}"
-            )
+        contact = contact_map[recipient["contact_id"]]
+        if recipient["email"] not in failed_emails:
+            sent_contact_ids.append(contact.id)
+            activities.append({
+                "user_id": current_user.id,
+                "contact_id": contact.id,
+                "activity_type": ActivityType.EMAIL_SENT,
+                "title": f"Batch email sent to {contact.name}",
+                "description": f"Subject: {recipient['subject']}",
+                "created_at": now
+            })
         else:
-            activity = ActivityLog(
-                user_id=current_user.id,
-                contact_id=contact.id,
-                activity_type=ActivityType.EMAIL_FAILED,
-                title=f"Failed to send batch email to {contact.name}",
-                description=f"Subject: {recipient['subject']}"
+            activities.append({
+                "user_id": current_user.id,
+                "contact_id": contact.id,
+                "activity_type": ActivityType.EMAIL_FAILED,
+                "title": f"Failed to send batch email to {contact.name}",
+                "description": f"Subject: {recipient['subject']}",
+                "created_at": now
+            })
+    
+    # Short write transaction: one UPDATE for all delivered contacts and one
+    # multi-row INSERT for the log
+    async with db.begin():
+        if sent_contact_ids:
+            await db.execute(
+                update(Contact)
+                .where(Contact.id.in_(sent_contact_ids))
+                .values(status=ContactStatus.CONTACTED, last_contacted_at=now)
+                .execution_options(synchronize_session=False)
             )
-        db.add(activity)
+        if activities:
+            await db.execute(insert(ActivityLog), activities)
     
-    db.commit()
+    await bump_user_version(current_user.id)
     
-    return {
+    response = ORJSONResponse({
         "success": True,
         "results": results,
         "message": f"Sent {results['success']} emails successfully, {results['failed']} failed"
-    }
+    })
+    await idempotency.save(response)
+    return response
 
 
 @router.post("/schedule-followup")
 async def schedule_followup(
     followup_request: ScheduleFollowupRequest,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Schedule a follow-up email for a contact.
@@ -258,10 +347,7 @@ async def schedule_followup(
         Success message
     """
     # Get contact
-    contact = db.query(Contact).filter(
-        Contact.id == followup_request.contact_id,
-        Contact.user_id == current_user.id
-    ).first()
+    contact = await ContactService.get_owned_contact(db, followup_request.contact_id, current_user.id)
     
     if not contact:
         raise HTTPException(
@@ -270,7 +356,7 @@ async def schedule_followup(
         )
     
     # Schedule follow-up
-    success = SchedulerService.schedule_followup(
+    success = await SchedulerService.schedule_followup(
         db=db,
         contact=contact,
         followup_date=followup_request.followup_date,
@@ -282,9 +368,10 @@ async def schedule_followup(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to schedule follow-up"
         )
+    await bump_user_version(current_user.id)
     
-    return {
+    return ORJSONResponse({
         "success": True,
         "message": f"Follow-up scheduled for {contact.name}",
-        "followup_date": followup_request.followup_date.isoformat()
-    }
+        "followup_date": followup_request.followup_date
+    })
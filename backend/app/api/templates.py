@@ -3,21 +3,26 @@ Templates API endpoints for managing email templates.
 """
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer
 from ..database import get_db
 from ..models.user import User
 from ..models.template import Template
-from ..models.contact import Contact
-from ..models.activity_log import ActivityLog, ActivityType
+from ..models.activity_log import ActivityType
 from ..schemas.template import (
     Template as TemplateSchema,
+    TemplateListItem,
     TemplateCreate,
     TemplateUpdate,
     TemplatePersonalize,
     PersonalizedTemplate
 )
 from ..services.llm_service import LLMService
+from ..services.contact_service import ContactService
+from ..services.activity_service import ActivityService
 from ..api.deps import get_current_active_user
+from ..utils.cache import bump_user_version
 
 router = APIRouter(prefix="/templates", tags=["Templates"])
 
@@ -26,7 +31,7 @@ router = APIRouter(prefix="/templates", tags=["Templates"])
 async def create_template(
     template_data: TemplateCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Create a new email template.
@@ -41,10 +46,9 @@ async def create_template(
     """
     # If this is marked as default, unset other defaults
     if template_data.is_default:
-        db.query(Template).filter(
-            Template.user_id == current_user.id,
-            Template.is_default == True
-        ).update({"is_default": False})
+        await db.execute(
+            update(Template).where(Template.is_default == True).values(is_default=False)
+        )
     
     # Create template
     template = Template(
@@ -52,26 +56,25 @@ async def create_template(
         user_id=current_user.id
     )
     db.add(template)
+    await db.commit()
+    await db.refresh(template)
+    await bump_user_version(current_user.id)
     
-    # Log activity
-    activity = ActivityLog(
+    # Log activity (batched by the background activity writer)
+    ActivityService.record(
         user_id=current_user.id,
         activity_type=ActivityType.TEMPLATE_CREATED,
         title=f"Created template: {template.name}",
         description=f"Template created with {len(template.body)} characters"
     )
-    db.add(activity)
-    
-    db.commit()
-    db.refresh(template)
     
     return template
 
 
-@router.get("/", response_model=List[TemplateSchema])
+@router.get("/", response_model=List[TemplateListItem])
 async def list_templates(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     List all templates for current user.
@@ -83,9 +86,12 @@ async def list_templates(
     Returns:
         List of templates
     """
-    templates = db.query(Template).filter(
-        Template.user_id == current_user.id
-    ).order_by(Template.is_default.desc(), Template.created_at.desc()).all()
+    result = await db.execute(
+        select(Template)
+        .options(defer(Template.body, raiseload=True))
+        .order_by(Template.is_default.desc(), Template.created_at.desc())
+    )
+    templates = result.scalars().all()
     
     return templates
 
@@ -94,7 +100,7 @@ async def list_templates(
 async def get_template(
     template_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get a specific template by ID.
@@ -107,10 +113,10 @@ async def get_template(
     Returns:
         Template object
     """
-    template = db.query(Template).filter(
-        Template.id == template_id,
-        Template.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Template).where(Template.id == template_id)
+    )
+    template = result.scalar_one_or_none()
     
     if not template:
         raise HTTPException(
@@ -126,7 +132,7 @@ async def update_template(
     template_id: int,
     template_data: TemplateUpdate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Update a template.
@@ -140,10 +146,10 @@ async def update_template(
     Returns:
         Updated template object
     """
-    template = db.query(Template).filter(
-        Template.id == template_id,
-        Template.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Template).where(Template.id == template_id)
+    )
+    template = result.scalar_one_or_none()
     
     if not template:
         raise HTTPException(
@@ -153,19 +159,20 @@ async def update_template(
     
     # If setting as default, unset other defaults
     if template_data.is_default:
-        db.query(Template).filter(
-            Template.user_id == current_user.id,
-            Template.id != template_id,
-            Template.is_default == True
-        ).update({"is_default": False})
+        await db.execute(
+            update(Template).where(
+                Template.id != template_id,
+                Template.is_default == True
+            ).values(is_default=False)
+        )
     
     # Update fields
     update_data = template_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(template, field, value)
     
-    db.commit()
-    db.refresh(template)
+    await db.commit()
+    await db.refresh(template)
     
     return template
 
@@ -174,7 +181,7 @@ async def update_template(
 async def delete_template(
     template_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Delete a template.
@@ -184,10 +191,10 @@ async def delete_template(
         current_user: Current authenticated user
         db: Database session
     """
-    template = db.query(Template).filter(
-        Template.id == template_id,
-        Template.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Template).where(Template.id == template_id)
+    )
+    template = result.scalar_one_or_none()
     
     if not template:
         raise HTTPException(
@@ -195,8 +202,9 @@ async def delete_template(
             detail="Template not found"
         )
     
-    db.delete(template)
-    db.commit()
+    await db.delete(template)
+    await db.commit()
+    await bump_user_version(current_user.id)
     
     return None
 
@@ -206,7 +214,7 @@ async def personalize_template(
     personalize_data: TemplatePersonalize,
     use_ai: bool = Query(False, description="Use AI for personalization"),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Personalize a template for a specific contact.
@@ -221,10 +229,10 @@ async def personalize_template(
         Personalized template with subject and body
     """
     # Get template
-    template = db.query(Template).filter(
-        Template.id == personalize_data.template_id,
-        Template.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Template).where(Template.id == personalize_data.template_id)
+    )
+    template = result.scalar_one_or_none()
     
     if not template:
         raise HTTPException(
@@ -233,10 +241,7 @@ async def personalize_template(
         )
     
     # Get contact
-    contact = db.query(Contact).filter(
-        Contact.id == personalize_data.contact_id,
-        Contact.user_id == current_user.id
-    ).first()
+    contact = await ContactService.get_owned_contact(db, personalize_data.contact_id, current_user.id)
     
     if not contact:
         raise HTTPException(
@@ -2,7 +2,8 @@
 Configuration management for ThesisLink application.
 Loads settings from environment variables with validation.
 """
-from typing import List
+from functools import cached_property, lru_cache
+from typing import FrozenSet, List
 from pydantic_settings import BaseSettings
 from pydantic import validator
 
@@ -41,6 +42,10 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: str = ""
     SMTP_FROM_EMAIL: str = ""
     SMTP_FROM_NAME: str = "ThesisLink"
+    # Pooled SMTP connections per server/account, and messages sent on one
+    # connection before it is reopened
+    SMTP_POOL_SIZE: int = 5
+    SMTP_MAX_MSGS_PER_CONN: int = 100
     
     # Gmail API
     GMAIL_CREDENTIALS_FILE: str = "credentials.json"
@@ -53,6 +58,9 @@ class Settings(BaseSettings):
     MAX_UPLOAD_SIZE: int = 10485760  # 10MB
     ALLOWED_FILE_TYPES: str = ".pdf,.doc,.docx,.txt"
     UPLOAD_DIR: str = "./uploads"
+    # Internal nginx location mapped to UPLOAD_DIR; when set, downloads are
+    # served by nginx via X-Accel-Redirect instead of streamed by the app
+    DOWNLOAD_ACCEL_REDIRECT_PREFIX: str = ""
     
     @validator("ALLOWED_FILE_TYPES", pre=True)
     def convert_file_types(cls, v):
@@ -60,6 +68,13 @@ class Settings(BaseSettings):
             return v
         return v
     
+    @cached_property
+    def allowed_file_extensions(self) -> FrozenSet[str]:
+        """ALLOWED_FILE_TYPES parsed once into a set of lowercase extensions."""
+        return frozenset(
+            ext.strip().lower() for ext in self.ALLOWED_FILE_TYPES.split(",") if ext.strip()
+        )
+    
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 60
     
@@ -72,5 +87,16 @@ class Settings(BaseSettings):
         case_sensitive = True
 
 
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Get the application settings, loading them from the environment once.
+    
+    Returns:
+        Settings: Shared settings instance
+    """
+    return Settings()
+
+
 # Create global settings instance
-settings = Settings()
+settings = get_settings()
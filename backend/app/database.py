@@ -1,38 +1,96 @@
 """
 Database configuration and session management.
-Sets up SQLAlchemy engine, session, and base model.
+Sets up SQLAlchemy engines, sessions, and base model.
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
 
-# Create database engine
+
+def get_async_database_url(url: str) -> str:
+    """
+    Map a synchronous database URL onto its asyncio driver.
+
+    Args:
+        url: Database URL as configured (e.g. postgresql://...)
+
+    Returns:
+        str: URL using asyncpg (PostgreSQL) or aiosqlite (SQLite)
+    """
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    if url.startswith("postgresql+psycopg2://"):
+        return url.replace("postgresql+psycopg2://", "postgresql+asyncpg://", 1)
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return url
+
+
+is_sqlite = "sqlite" in settings.DATABASE_URL
+
+# Connection pool sizing for server databases (SQLite uses its default pool)
+pool_options = {} if is_sqlite else {
+    "pool_size": 20,
+    "max_overflow": 40,
+    "pool_recycle": 3600,
+}
+
+# Create database engine (used by Celery workers and table creation)
 engine = create_engine(
     settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {},
+    connect_args={"check_same_thread": False} if is_sqlite else {},
     pool_pre_ping=True,
+    **pool_options,
 )
 
-# Create session factory
+# Create async database engine (used by API request handlers)
+# query_cache_size: compiled SQL cache shared by all requests (default 500);
+# prepared_statement_cache_size: per-connection asyncpg prepared statements
+async_engine = create_async_engine(
+    get_async_database_url(settings.DATABASE_URL),
+    pool_pre_ping=True,
+    query_cache_size=1200,
+    connect_args={} if is_sqlite else {"prepared_statement_cache_size": 512},
+    **pool_options,
+)
+
+
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    """Enforce foreign keys (and ON DELETE CASCADE) on SQLite connections."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+if is_sqlite:
+    event.listen(engine, "connect", _enable_sqlite_foreign_keys)
+    event.listen(async_engine.sync_engine, "connect", _enable_sqlite_foreign_keys)
+
+# Create session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
 
 # Create base class for models
 Base = declarative_base()
 
 
-def get_db():
+async def get_db():
     """
-    Dependency function to get database session.
+    Dependency function to get an async database session.
     Yields session and ensures it's closed after use.
     """
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
-def init_db():
-    """Initialize database tables."""
-    Base.metadata.create_all(bind=engine)
+async def init_db():
+    """Initialize database tables (without blocking the event loop)."""
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
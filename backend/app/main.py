@@ -3,12 +3,21 @@ Main FastAPI application entry point.
 """
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+import asyncio
+import logging
 import os
 from .config import settings
 from .database import engine, Base, init_db
 from .api import auth, contacts, templates, documents, email, dashboard
+from .services.activity_service import ActivityService
+from .services.smtp_pool import get_smtp_pool, close_smtp_pools
+from .services.llm_service import close_openai_client
+from .utils.redis_client import close_redis
+from .utils.responses import ORJSONResponse
+from .utils.log_config import start_logging, stop_logging
+
+logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
@@ -18,20 +27,47 @@ async def lifespan(app: FastAPI):
     Handles startup and shutdown events.
     """
     # Startup
-    print("Starting ThesisLink application...")
+    start_logging()
+    logger.info("Starting ThesisLink application...")
     
     # Create database tables
-    init_db()
-    print("Database initialized")
+    await init_db()
+    logger.info("Database initialized")
     
     # Create upload directory if it doesn't exist
     os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
-    print(f"Upload directory ready: {settings.UPLOAD_DIR}")
+    logger.info("Upload directory ready: %s", settings.UPLOAD_DIR)
+    
+    # Start the batched activity log writer
+    ActivityService.start()
+    
+    # Open pooled SMTP connections in the background
+    smtp_warm_up = None
+    if settings.SMTP_USERNAME:
+        smtp_warm_up = asyncio.create_task(get_smtp_pool().warm_up())
     
     yield
     
     # Shutdown
-    print("Shutting down ThesisLink application...")
+    logger.info("Shutting down ThesisLink application...")
+    
+    # Flush pending activity log entries
+    await ActivityService.stop()
+    
+    # Close pooled SMTP connections
+    if smtp_warm_up is not None:
+        smtp_warm_up.cancel()
+        await asyncio.gather(smtp_warm_up, return_exceptions=True)
+    await close_smtp_pools()
+    
+    # Close the OpenAI client's HTTP connection pool
+    await close_openai_client()
+    
+    # Close the Redis client used for rate limits and idempotency keys
+    await close_redis()
+    
+    # Flush queued log records
+    stop_logging()
 
 
 # Create FastAPI application
@@ -42,6 +78,7 @@ app = FastAPI(
     docs_url="/api/docs",
     redoc_url="/api/redoc",
     openapi_url="/api/openapi.json",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -91,7 +128,7 @@ async def global_exception_handler(request, exc):
     if settings.DEBUG:
         raise exc
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={"detail": "An unexpected error occurred"}
     )
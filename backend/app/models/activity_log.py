@@ -1,7 +1,8 @@
 """
 Activity Log model for tracking user actions and email activities.
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, JSON, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -29,22 +30,32 @@ class ActivityLog(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    contact_id = Column(Integer, ForeignKey("contacts.id"), nullable=True)
+    contact_id = Column(Integer, ForeignKey("contacts.id", ondelete="CASCADE"), nullable=True)
     
     # Activity Information
-    activity_type = Column(Enum(ActivityType), nullable=False, index=True)
+    activity_type = Column(Enum(ActivityType), nullable=False)
     title = Column(String, nullable=False)
     description = Column(Text, nullable=True)
     
-    # Additional Data (JSON field for flexible storage)
-    metadata = Column(JSON, nullable=True)
+    # Additional Data (JSON field for flexible storage; JSONB on PostgreSQL).
+    # Mapped as "meta" because "metadata" is reserved on declarative models.
+    meta = Column("metadata", JSON().with_variant(JSONB(), "postgresql"), nullable=True)
     
     # Timestamp
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
     
     # Relationships
-    user = relationship("User", back_populates="activity_logs")
-    contact = relationship("Contact", back_populates="activity_logs")
+    user = relationship("User", back_populates="activity_logs", lazy="raise_on_sql")
+    contact = relationship("Contact", back_populates="activity_logs", lazy="raise_on_sql")
+    
+    # Composite indexes matching the per-user activity feed filters
+    __table_args__ = (
+        Index("ix_activity_logs_user_created", user_id, created_at.desc(), id.desc()),
+        Index("ix_activity_logs_user_type_created", user_id, activity_type, created_at.desc()),
+        Index("ix_activity_logs_user_contact", user_id, contact_id),
+        # Containment (@>) lookups on metadata keys
+        Index("ix_activity_logs_meta_gin", meta, postgresql_using="gin"),
+    )
     
     def __repr__(self):
         return f"<ActivityLog(type='{self.activity_type}', id={self.id})>"
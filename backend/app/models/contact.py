@@ -1,9 +1,10 @@
 """
 Contact model for managing professor/supervisor information.
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, Computed, Index, DDL, event, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
+from typing import Dict
 import enum
 from ..database import Base
 
@@ -35,6 +36,16 @@ class Contact(Base):
     research_interest = Column(Text, nullable=True)
     website = Column(String, nullable=True)
     
+    # Lowercased concatenation of searchable fields (trigram-indexed on PostgreSQL)
+    search_text = Column(
+        Text,
+        Computed(
+            "lower(name || ' ' || email || ' ' || university || ' ' || "
+            "coalesce(research_interest, ''))",
+            persisted=True
+        )
+    )
+    
     # Status and Notes
     status = Column(Enum(ContactStatus), default=ContactStatus.NEW, index=True)
     notes = Column(Text, nullable=True)
@@ -49,6 +60,81 @@ class Contact(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
-    user = relationship("User", back_populates="contacts")
-    documents = relationship("Document", back_populates="contact", cascade="all, delete-orphan")
-    activity_logs = relationship("ActivityLog", back_populates="contact", cascade="all, delete-orphan")
+    user = relationship("User", back_populates="contacts", lazy="raise_on_sql")
+    documents = relationship("Document", back_populates="contact", cascade="all, delete-orphan", passive_deletes=True)
+    activity_logs = relationship("ActivityLog", back_populates="contact", cascade="all, delete-orphan", passive_deletes=True)
+    
+    # Per-instance cache for placeholder_map (plain attributes, not columns)
+    _placeholder_source = None
+    _placeholder_map = None
+    
+    __table_args__ = (
+        # Keyset pagination of a user's contacts (newest first)
+        Index("ix_contacts_user_created", user_id, created_at.desc(), id.desc()),
+        # Status counts and pipeline samples (covering on PostgreSQL 11+)
+        Index(
+            "ix_contacts_user_status_updated",
+            user_id,
+            status,
+            updated_at.desc(),
+            postgresql_include=["id", "name", "university", "last_contacted_at"]
+        ),
+        # Upcoming follow-ups
+        Index("ix_contacts_user_follow_up", user_id, follow_up_date),
+        # Due follow-ups across all users (hourly scheduler scan)
+        Index(
+            "ix_contacts_follow_up_due",
+            follow_up_date,
+            postgresql_where=text("status = 'FOLLOW_UP_SCHEDULED'"),
+            sqlite_where=text("status = 'FOLLOW_UP_SCHEDULED'")
+        ),
+        Index(
+            "ix_contacts_search_text_trgm",
+            "search_text",
+            postgresql_using="gin",
+            postgresql_ops={"search_text": "gin_trgm_ops"}
+        ),
+    )
+    
+    @property
+    def placeholder_map(self) -> Dict[str, str]:
+        """
+        Template placeholder values for this contact.
+        
+        Built once and reused until one of the underlying fields changes,
+        so rendering several templates for a contact shares one dict.
+        Callers must not modify the returned dict.
+        
+        Returns:
+            Dictionary mapping placeholder names to values
+        """
+        source = (
+            self.name,
+            self.email,
+            self.university,
+            self.department,
+            self.research_interest,
+            self.website,
+        )
+        if self._placeholder_map is None or self._placeholder_source != source:
+            self._placeholder_source = source
+            self._placeholder_map = {
+                "ProfName": self.name,
+                "ProfessorName": self.name,
+                "Name": self.name,
+                "Email": self.email,
+                "University": self.university,
+                "Department": self.department or "your department",
+                "ResearchInterest": self.research_interest or "your research area",
+                "ResearchTopic": self.research_interest or "your research area",
+                "Website": self.website or "",
+            }
+        return self._placeholder_map
+
+
+# The trigram operator class used by the search index lives in pg_trgm
+event.listen(
+    Contact.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
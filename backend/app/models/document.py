@@ -1,7 +1,7 @@
 """
 Document model for file attachments (CVs, SOPs, transcripts).
 """
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, BigInteger
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, BigInteger, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..database import Base
@@ -14,7 +14,7 @@ class Document(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    contact_id = Column(Integer, ForeignKey("contacts.id"), nullable=True)
+    contact_id = Column(Integer, ForeignKey("contacts.id", ondelete="CASCADE"), nullable=True)
     
     # File Information
     filename = Column(String, nullable=False)
@@ -30,8 +30,14 @@ class Document(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
-    user = relationship("User", back_populates="documents")
-    contact = relationship("Contact", back_populates="documents")
+    user = relationship("User", back_populates="documents", lazy="raise_on_sql")
+    contact = relationship("Contact", back_populates="documents", lazy="raise_on_sql")
+    
+    __table_args__ = (
+        # Keyset pagination of a user's documents (newest first)
+        Index("ix_documents_user_created", user_id, created_at.desc(), id.desc()),
+        Index("ix_documents_user_contact", user_id, contact_id),
+    )
     
     def __repr__(self):
         return f"<Document(filename='{self.filename}', id={self.id})>"
@@ -1,7 +1,7 @@
 """
 Template model for email templates and SOPs.
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..database import Base
@@ -30,7 +30,20 @@ class Template(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
-    user = relationship("User", back_populates="templates")
+    user = relationship("User", back_populates="templates", lazy="raise_on_sql")
+    
+    __table_args__ = (
+        # Template list order (defaults first, then newest)
+        Index("ix_templates_user_default_created", user_id, is_default.desc(), created_at.desc()),
+        # At most one default template per user; also serves "unset other defaults"
+        Index(
+            "uq_templates_user_default",
+            user_id,
+            unique=True,
+            postgresql_where=text("is_default"),
+            sqlite_where=text("is_default = 1")
+        ),
+    )
     
     def __repr__(self):
         return f"<Template(name='{self.name}', id={self.id})>"
@@ -0,0 +1,48 @@
+"""
+Per-user scoping of ORM queries.
+
+Request sessions are tagged with the authenticated user's ID; every ORM
+SELECT, UPDATE and DELETE touching a user-owned model then gets a
+`user_id = :id` criteria added automatically (including joins and aliases).
+"""
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import ORMExecuteState, Session, with_loader_criteria
+from .contact import Contact
+from .template import Template
+from .document import Document
+from .activity_log import ActivityLog
+
+# Session.info key holding the user every query is scoped to
+TENANT_USER_ID = "tenant_user_id"
+
+# Models owned by a user through their user_id column
+TENANT_MODELS = (Contact, Template, Document, ActivityLog)
+
+
+def scope_session_to_user(db: AsyncSession, user_id: int) -> None:
+    """
+    Restrict all subsequent ORM statements on a session to one user's rows.
+
+    Args:
+        db: Database session
+        user_id: Owner whose rows remain visible
+    """
+    db.info[TENANT_USER_ID] = user_id
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _add_tenant_criteria(execute_state: ORMExecuteState) -> None:
+    """Add the owner filter to ORM statements on scoped sessions."""
+    user_id = execute_state.session.info.get(TENANT_USER_ID)
+    if user_id is None:
+        return
+    if not (execute_state.is_select or execute_state.is_update or execute_state.is_delete):
+        return
+    if execute_state.is_column_load or execute_state.is_relationship_load:
+        return
+
+    execute_state.statement = execute_state.statement.options(*(
+        with_loader_criteria(model, lambda cls: cls.user_id == user_id, include_aliases=True)
+        for model in TENANT_MODELS
+    ))
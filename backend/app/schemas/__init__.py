@@ -5,6 +5,7 @@ from .user import User, UserCreate, UserUpdate, UserInDB, Token, TokenData
 from .contact import Contact, ContactCreate, ContactUpdate, ContactInDB, ContactList
 from .template import (
     Template,
+    TemplateListItem,
     TemplateCreate,
     TemplateUpdate,
     TemplateInDB,
@@ -27,6 +28,7 @@ __all__ = [
     "ContactInDB",
     "ContactList",
     "Template",
+    "TemplateListItem",
     "TemplateCreate",
     "TemplateUpdate",
     "TemplateInDB",
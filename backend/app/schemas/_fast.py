@@ -0,0 +1,47 @@
+"""
+Fast construction of response schemas from trusted ORM objects.
+"""
+from typing import Any, List, Type, TypeVar
+from pydantic import BaseModel
+
+SchemaT = TypeVar("SchemaT", bound=BaseModel)
+
+
+def from_orm_fast(cls: Type[SchemaT], obj: Any) -> SchemaT:
+    """
+    Build a schema instance from an ORM object without validation.
+
+    Only use this for data read back from the database (already typed by
+    the columns); request input must still go through model_validate.
+
+    Args:
+        cls: Response schema class
+        obj: ORM object with an attribute for every schema field
+
+    Returns:
+        Schema instance with all fields set
+    """
+    return cls.model_construct(
+        _fields_set=set(cls.model_fields),
+        **{name: getattr(obj, name) for name in cls.model_fields}
+    )
+
+
+def response_columns(cls: Type[BaseModel], model: Any) -> List[Any]:
+    """
+    Select exactly a response schema's fields, labelled with their JSON names.
+    
+    Row mappings from a select of these columns can be serialized by
+    orjson directly, without building ORM objects or schema instances.
+    
+    Args:
+        cls: Response schema class
+        model: ORM model with a column attribute for every schema field
+        
+    Returns:
+        List of labelled column expressions
+    """
+    return [
+        getattr(model, name).label(field.serialization_alias or name)
+        for name, field in cls.model_fields.items()
+    ]
@@ -1,7 +1,7 @@
 """
 Activity Log schemas for request/response validation.
 """
-from pydantic import BaseModel
+from pydantic import AliasChoices, BaseModel, Field
 from typing import Optional, Dict, Any
 from datetime import datetime
 from ..models.activity_log import ActivityType
@@ -12,7 +12,11 @@ class ActivityLogBase(BaseModel):
     activity_type: ActivityType
     title: str
     description: Optional[str] = None
-    metadata: Optional[Dict[str, Any]] = None
+    meta: Optional[Dict[str, Any]] = Field(
+        default=None,
+        validation_alias=AliasChoices("meta", "metadata"),
+        serialization_alias="metadata"
+    )
 
 
 class ActivityLogCreate(ActivityLogBase):
@@ -40,5 +44,5 @@ class ActivityLogList(BaseModel):
     """Schema for paginated activity log list."""
     total: int
     logs: list[ActivityLog]
-    page: int
     page_size: int
+    next_cursor: Optional[str] = None
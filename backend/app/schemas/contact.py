@@ -38,6 +38,8 @@ class ContactUpdate(BaseModel):
 
 class ContactInDB(ContactBase):
     """Schema for contact in database."""
+    # Stored addresses were validated on the way in; skip email-validator on output
+    email: str
     id: int
     user_id: int
     status: ContactStatus
@@ -60,5 +62,5 @@ class ContactList(BaseModel):
     """Schema for paginated contact list."""
     total: int
     contacts: list[Contact]
-    page: int
     page_size: int
+    next_cursor: Optional[str] = None
@@ -39,6 +39,13 @@ class Document(DocumentInDB):
     pass
 
 
+class DocumentList(BaseModel):
+    """Schema for paginated document list."""
+    documents: list[Document]
+    page_size: int
+    next_cursor: Optional[str] = None
+
+
 class DocumentUploadResponse(BaseModel):
     """Schema for document upload response."""
     id: int
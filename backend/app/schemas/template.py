@@ -47,6 +47,22 @@ class Template(TemplateInDB):
     pass
 
 
+class TemplateListItem(BaseModel):
+    """Schema for template list entries (without the body)."""
+    id: int
+    user_id: int
+    name: str
+    subject: str
+    description: Optional[str] = None
+    is_default: Optional[bool] = False
+    use_ai_personalization: Optional[bool] = False
+    created_at: datetime
+    updated_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
 class TemplatePersonalize(BaseModel):
     """Schema for AI personalization request."""
     template_id: int
@@ -1,6 +1,7 @@
 """
 User schemas for request/response validation.
 """
+from dataclasses import dataclass
 from pydantic import BaseModel, EmailStr, Field
 from typing import Optional
 from datetime import datetime
@@ -28,6 +29,8 @@ class UserUpdate(BaseModel):
 
 class UserInDB(UserBase):
     """Schema for user in database."""
+    # Stored addresses were validated on the way in; skip email-validator on output
+    email: str
     id: int
     is_active: bool
     is_superuser: bool
@@ -49,7 +52,8 @@ class Token(BaseModel):
     token_type: str = "bearer"
 
 
-class TokenData(BaseModel):
-    """Schema for token data."""
+@dataclass(slots=True)
+class TokenData:
+    """Decoded token claims (internal only, so no pydantic validation)."""
     username: Optional[str] = None
     user_id: Optional[int] = None
@@ -6,6 +6,8 @@ from .email_service import EmailService
 from .llm_service import LLMService
 from .file_service import FileService
 from .scheduler_service import SchedulerService
+from .contact_service import ContactService
+from .activity_service import ActivityService
 
 __all__ = [
     "AuthService",
@@ -13,4 +15,6 @@ __all__ = [
     "LLMService",
     "FileService",
     "SchedulerService",
+    "ContactService",
+    "ActivityService",
 ]
@@ -0,0 +1,165 @@
+"""
+Activity service providing a write-behind queue for activity log entries.
+
+Handlers enqueue activity rows instead of inserting them in their own
+transaction; a background task drains the queue and writes rows in
+batched multi-row INSERTs. The activity feed is eventually consistent
+(typically within ~100ms).
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy import insert
+from ..database import AsyncSessionLocal
+from ..models.activity_log import ActivityLog, ActivityType
+from ..utils.cache import bump_user_version
+
+logger = logging.getLogger(__name__)
+
+# Flush a batch when it reaches this many rows or this many seconds have passed
+BATCH_MAX_SIZE = 500
+BATCH_MAX_WAIT = 0.1
+
+_queue: Optional[asyncio.Queue] = None
+_writer: Optional[asyncio.Task] = None
+
+# Queued by stop(): the writer finishes its current batch and returns
+_STOP = object()
+
+# Set once shutdown begins so record() does not start a writer nobody flushes
+_stopping = False
+
+
+class ActivityService:
+    """Service class for activity log operations."""
+
+    @staticmethod
+    def start() -> None:
+        """Start the background writer on the running event loop (idempotent)."""
+        global _queue, _writer, _stopping
+        _stopping = False
+        if _writer is not None and not _writer.done():
+            return
+        # Reuse the queue of a failed writer so its pending entries are kept
+        if _queue is None:
+            _queue = asyncio.Queue()
+        _writer = asyncio.get_running_loop().create_task(ActivityService._drain())
+
+    @staticmethod
+    async def stop() -> None:
+        """Stop the background writer after it has written every queued entry."""
+        global _queue, _writer, _stopping
+        _stopping = True
+        if _writer is None:
+            return
+        if not _writer.done():
+            _queue.put_nowait(_STOP)
+            try:
+                await _writer
+            except Exception:
+                logger.exception("Activity writer failed during shutdown")
+
+        # Entries recorded while the writer finished (or left by a failed writer)
+        while not _queue.empty():
+            remaining = []
+            while not _queue.empty():
+                row = _queue.get_nowait()
+                if row is not _STOP:
+                    remaining.append(row)
+            if remaining:
+                await ActivityService._write_batch(remaining)
+
+        _queue = None
+        _writer = None
+
+    @staticmethod
+    def record(
+        user_id: int,
+        activity_type: ActivityType,
+        title: str,
+        description: Optional[str] = None,
+        contact_id: Optional[int] = None
+    ) -> None:
+        """
+        Queue an activity log entry for a batched background insert.
+
+        Args:
+            user_id: User who performed the activity
+            activity_type: Type of activity
+            title: Short activity title
+            description: Optional longer description
+            contact_id: Optional related contact
+        """
+        if not _stopping:
+            ActivityService.start()
+        elif _queue is None:
+            # Already flushed and stopped; starting a writer now would never be flushed
+            logger.warning("Activity writer stopped, dropping entry: %s", title)
+            return
+        _queue.put_nowait({
+            "user_id": user_id,
+            "contact_id": contact_id,
+            "activity_type": activity_type,
+            "title": title,
+            "description": description,
+            "created_at": datetime.utcnow(),
+        })
+
+    @staticmethod
+    async def _drain() -> None:
+        """Collect queued entries into batches and write them until stop() is queued."""
+        loop = asyncio.get_running_loop()
+        while True:
+            row = await _queue.get()
+            if row is _STOP:
+                return
+            batch = [row]
+            stopping = False
+            deadline = loop.time() + BATCH_MAX_WAIT
+            while len(batch) < BATCH_MAX_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(_queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if row is _STOP:
+                    stopping = True
+                    break
+                batch.append(row)
+            await ActivityService._write_batch(batch)
+            if stopping:
+                return
+
+    @staticmethod
+    async def _write_batch(batch: List[Dict[str, Any]]) -> None:
+        """
+        Insert a batch of activity rows in one statement.
+
+        If the batch fails (e.g. a contact was deleted before its activity
+        was written), rows are retried individually so one bad row does not
+        drop the rest.
+
+        Args:
+            batch: Activity row dictionaries
+        """
+        async with AsyncSessionLocal() as db:
+            try:
+                await db.execute(insert(ActivityLog), batch)
+                await db.commit()
+            except Exception as e:
+                logger.warning("Error writing activity batch, retrying rows individually: %s", e)
+                await db.rollback()
+                for row in batch:
+                    try:
+                        await db.execute(insert(ActivityLog), [row])
+                        await db.commit()
+                    except Exception:
+                        logger.exception("Dropping activity log entry")
+                        await db.rollback()
+
+        # Activity feeds and dashboard counts are cached per user version
+        for user_id in {row["user_id"] for row in batch}:
+            await bump_user_version(user_id)
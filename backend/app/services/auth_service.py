@@ -1,34 +1,53 @@
 """
 Authentication service for user management and authentication.
 """
-from typing import Optional
-from sqlalchemy.orm import Session
+import asyncio
+from typing import Optional, Set
+from sqlalchemy import select, bindparam, or_
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 from ..models.user import User
 from ..schemas.user import UserCreate, UserUpdate
 from ..utils.security import verify_password, get_password_hash
+from ..utils.cache import bump_user_auth_version
+
+# Prebuilt statements reused across requests (cache key computed once)
+_user_by_email_stmt = select(User).where(User.email == bindparam("email"))
+_user_by_username_stmt = select(User).where(User.username == bindparam("username"))
+_user_by_id_stmt = select(User).where(User.id == bindparam("user_id"))
+# Login lookup by username or email in one round trip
+_user_by_login_stmt = select(User).where(
+    or_(User.username == bindparam("login"), User.email == bindparam("login"))
+)
+# Both uniqueness checks in one round trip (a NULL parameter never matches)
+_taken_identity_stmt = select(User.username, User.email).where(
+    or_(User.username == bindparam("username"), User.email == bindparam("email"))
+)
 
 
 class AuthService:
     """Service class for authentication operations."""
     
     @staticmethod
-    def get_user_by_email(db: Session, email: str) -> Optional[User]:
+    async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
         """Get user by email."""
-        return db.query(User).filter(User.email == email).first()
+        result = await db.execute(_user_by_email_stmt, {"email": email})
+        return result.scalar_one_or_none()
     
     @staticmethod
-    def get_user_by_username(db: Session, username: str) -> Optional[User]:
+    async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
         """Get user by username."""
-        return db.query(User).filter(User.username == username).first()
+        result = await db.execute(_user_by_username_stmt, {"username": username})
+        return result.scalar_one_or_none()
     
     @staticmethod
-    def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
+    async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[User]:
         """Get user by ID."""
-        return db.query(User).filter(User.id == user_id).first()
+        result = await db.execute(_user_by_id_stmt, {"user_id": user_id})
+        return result.scalar_one_or_none()
     
     @staticmethod
-    def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
+    async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[User]:
         """
         Authenticate user with username and password.
         
@@ -40,15 +59,16 @@ class AuthService:
         Returns:
             User object if authentication successful, None otherwise
         """
-        # Try to find user by username or email
-        user = AuthService.get_user_by_username(db, username)
-        if not user:
-            user = AuthService.get_user_by_email(db, username)
+        # Find user by username or email, preferring a username match
+        result = await db.execute(_user_by_login_stmt, {"login": username})
+        users = result.scalars().all()
+        user = next((u for u in users if u.username == username), users[0] if users else None)
         
         if not user:
             return None
         
-        if not verify_password(password, user.hashed_password):
+        # bcrypt is deliberately slow; keep it off the event loop
+        if not await asyncio.to_thread(verify_password, password, user.hashed_password):
             return None
         
         if not user.is_active:
@@ -57,7 +77,33 @@ class AuthService:
         return user
     
     @staticmethod
-    def create_user(db: Session, user_data: UserCreate) -> User:
+    async def get_taken_fields(
+        db: AsyncSession,
+        username: Optional[str] = None,
+        email: Optional[str] = None
+    ) -> Set[str]:
+        """
+        Check which of a username and email already belong to a user.
+        
+        Args:
+            db: Database session
+            username: Username to check (None to skip)
+            email: Email to check (None to skip)
+            
+        Returns:
+            Subset of {"username", "email"} that is already registered
+        """
+        result = await db.execute(_taken_identity_stmt, {"username": username, "email": email})
+        taken = set()
+        for row in result:
+            if username is not None and row.username == username:
+                taken.add("username")
+            if email is not None and row.email == email:
+                taken.add("email")
+        return taken
+    
+    @staticmethod
+    async def create_user(db: AsyncSession, user_data: UserCreate) -> User:
         """
         Create a new user.
         
@@ -71,38 +117,41 @@ class AuthService:
         Raises:
             HTTPException: If username or email already exists
         """
-        # Check if username exists
-        if AuthService.get_user_by_username(db, user_data.username):
+        # Check if username or email exists
+        taken = await AuthService.get_taken_fields(db, user_data.username, user_data.email)
+        if "username" in taken:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Username already registered"
             )
         
-        # Check if email exists
-        if AuthService.get_user_by_email(db, user_data.email):
+        if "email" in taken:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
         
+        # Hash off the event loop (bcrypt releases the GIL)
+        hashed_password = await asyncio.to_thread(get_password_hash, user_data.password)
+        
         # Create user
         db_user = User(
             email=user_data.email,
             username=user_data.username,
             full_name=user_data.full_name,
-            hashed_password=get_password_hash(user_data.password),
+            hashed_password=hashed_password,
             is_active=True,
             is_superuser=False,
         )
         
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
         
         return db_user
     
     @staticmethod
-    def update_user(db: Session, user_id: int, user_data: UserUpdate) -> User:
+    async def update_user(db: AsyncSession, user_id: int, user_data: UserUpdate) -> User:
         """
         Update user information.
         
@@ -117,39 +166,47 @@ class AuthService:
         Raises:
             HTTPException: If user not found or username/email already exists
         """
-        user = AuthService.get_user_by_id(db, user_id)
+        user = await AuthService.get_user_by_id(db, user_id)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
         
-        # Check username uniqueness if being updated
-        if user_data.username and user_data.username != user.username:
-            if AuthService.get_user_by_username(db, user_data.username):
+        # Check uniqueness of whichever of username/email is being changed
+        new_username = user_data.username if user_data.username and user_data.username != user.username else None
+        new_email = user_data.email if user_data.email and user_data.email != user.email else None
+        taken = set()
+        if new_username or new_email:
+            taken = await AuthService.get_taken_fields(db, new_username, new_email)
+        
+        if new_username:
+            if "username" in taken:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="Username already taken"
                 )
-            user.username = user_data.username
+            user.username = new_username
         
-        # Check email uniqueness if being updated
-        if user_data.email and user_data.email != user.email:
-            if AuthService.get_user_by_email(db, user_data.email):
+        if new_email:
+            if "email" in taken:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="Email already registered"
                 )
-            user.email = user_data.email
+            user.email = new_email
         
         # Update other fields
         if user_data.full_name is not None:
             user.full_name = user_data.full_name
         
         if user_data.password:
-            user.hashed_password = get_password_hash(user_data.password)
+            user.hashed_password = await asyncio.to_thread(get_password_hash, user_data.password)
+        
+        await db.commit()
+        await db.refresh(user)
         
-        db.commit()
-        db.refresh(user)
+        # Drop the stale copy get_current_user caches in every worker
+        await bump_user_auth_version(user_id)
         
         return user
@@ -0,0 +1,58 @@
+"""
+Contact service for aggregate contact queries shared across endpoints.
+"""
+from typing import Dict, Optional
+from sqlalchemy import select, func, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models.contact import Contact, ContactStatus
+
+# Prebuilt statement reused across requests (cache key computed once)
+_owned_contact_stmt = select(Contact).where(
+    Contact.id == bindparam("contact_id"),
+    Contact.user_id == bindparam("user_id")
+)
+
+
+class ContactService:
+    """Service class for contact operations."""
+
+    @staticmethod
+    async def get_owned_contact(db: AsyncSession, contact_id: int, user_id: int) -> Optional[Contact]:
+        """
+        Get a contact by ID, scoped to its owner.
+
+        Args:
+            db: Database session
+            contact_id: Contact ID
+            user_id: Owner of the contact
+
+        Returns:
+            Contact object or None if not found
+        """
+        result = await db.execute(
+            _owned_contact_stmt,
+            {"contact_id": contact_id, "user_id": user_id}
+        )
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def count_by_status(db: AsyncSession, user_id: int) -> Dict[ContactStatus, int]:
+        """
+        Count a user's contacts per status in a single GROUP BY query.
+
+        Args:
+            db: Database session
+            user_id: Owner of the contacts
+
+        Returns:
+            Dictionary mapping every ContactStatus to its count (zero-filled)
+        """
+        result = await db.execute(
+            select(Contact.status, func.count(Contact.id))
+            .where(Contact.user_id == user_id)
+            .group_by(Contact.status)
+        )
+        counts = {status: 0 for status in ContactStatus}
+        for status, count in result.all():
+            counts[status] = count
+        return counts
@@ -2,27 +2,114 @@
 Email service for sending emails via SMTP or Gmail API.
 """
 import asyncio
+import base64
+import logging
+import mmap
+import os
+import re
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
-from email import encoders
 from typing import List, Optional, Dict
 from datetime import datetime
-import aiosmtplib
 from ..config import settings
+from .smtp_pool import get_smtp_pool
+
+logger = logging.getLogger(__name__)
+
+# Compiled once at import instead of on every validation call
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
 
 
 class EmailService:
     """Service class for email operations."""
     
+    @staticmethod
+    def _encode_file_base64(file_path: str) -> str:
+        """Base64-encode a file from an mmap, without a raw bytes copy."""
+        with open(file_path, "rb") as attachment:
+            if os.fstat(attachment.fileno()).st_size == 0:
+                return ""
+            with mmap.mmap(attachment.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return base64.encodebytes(mapped).decode("ascii")
+    
+    @staticmethod
+    def build_attachment_parts(attachments: Optional[List[str]] = None) -> List[MIMEBase]:
+        """
+        Read and base64-encode attachment files into MIME parts.
+        
+        Args:
+            attachments: List of file paths to attach
+            
+        Returns:
+            List of encoded parts; unreadable files are skipped
+        """
+        parts = []
+        for file_path in attachments or []:
+            try:
+                part = MIMEBase("application", "octet-stream")
+                part.set_payload(EmailService._encode_file_base64(file_path))
+                part["Content-Transfer-Encoding"] = "base64"
+                filename = os.path.basename(file_path)
+                part.add_header(
+                    "Content-Disposition",
+                    f"attachment; filename= {filename}",
+                )
+                parts.append(part)
+            except Exception as e:
+                logger.warning("Failed to attach file %s: %s", file_path, e)
+        
+        return parts
+    
+    @staticmethod
+    def build_message(
+        to_email: str,
+        subject: str,
+        body: str,
+        attachments: Optional[List[str]] = None,
+        is_html: bool = False,
+        attachment_parts: Optional[List[MIMEBase]] = None
+    ) -> MIMEMultipart:
+        """
+        Build a MIME message with optional attachments.
+        
+        Args:
+            to_email: Recipient email address
+            subject: Email subject
+            body: Email body
+            attachments: List of file paths to attach
+            is_html: Whether body is HTML
+            attachment_parts: Pre-built parts to use instead of reading attachments
+            
+        Returns:
+            MIMEMultipart: Message ready to send
+        """
+        message = MIMEMultipart()
+        message["From"] = f"{settings.SMTP_FROM_NAME} <{settings.SMTP_FROM_EMAIL}>"
+        message["To"] = to_email
+        message["Subject"] = subject
+        
+        # Add body
+        body_type = "html" if is_html else "plain"
+        message.attach(MIMEText(body, body_type))
+        
+        # Add attachments if any; pre-built parts are shared read-only
+        if attachment_parts is None:
+            attachment_parts = EmailService.build_attachment_parts(attachments)
+        for part in attachment_parts:
+            message.attach(part)
+        
+        return message
+    
     @staticmethod
     async def send_email_smtp(
         to_email: str,
         subject: str,
         body: str,
         attachments: Optional[List[str]] = None,
-        is_html: bool = False
+        is_html: bool = False,
+        attachment_parts: Optional[List[MIMEBase]] = None
     ) -> bool:
         """
         Send email using SMTP.
@@ -33,53 +120,25 @@ class EmailService:
             body: Email body
             attachments: List of file paths to attach
             is_html: Whether body is HTML
+            attachment_parts: Pre-built parts to use instead of reading attachments
             
         Returns:
             bool: True if sent successfully
         """
         try:
             # Create message
-            message = MIMEMultipart()
-            message["From"] = f"{settings.SMTP_FROM_NAME} <{settings.SMTP_FROM_EMAIL}>"
-            message["To"] = to_email
-            message["Subject"] = subject
-            
-            # Add body
-            body_type = "html" if is_html else "plain"
-            message.attach(MIMEText(body, body_type))
-            
-            # Add attachments if any
-            if attachments:
-                for file_path in attachments:
-                    try:
-                        with open(file_path, "rb") as attachment:
-                            part = MIMEBase("application", "octet-stream")
-                            part.set_payload(attachment.read())
-                        
-                        encoders.encode_base64(part)
-                        filename = file_path.split("/")[-1].split("\\")[-1]
-                        part.add_header(
-                            "Content-Disposition",
-                            f"attachment; filename= {filename}",
-                        )
-                        message.attach(part)
-                    except Exception as e:
-                        print(f"Failed to attach file {file_path}: {e}")
-            
-            # Send email using aiosmtplib for async support
-            await aiosmtplib.send(
-                message,
-                hostname=settings.SMTP_HOST,
-                port=settings.SMTP_PORT,
-                username=settings.SMTP_USERNAME,
-                password=settings.SMTP_PASSWORD,
-                start_tls=True,
+            message = EmailService.build_message(
+                to_email, subject, body, attachments, is_html, attachment_parts
             )
             
+            # Send over a pooled connection (no per-email handshake)
+            async with get_smtp_pool().get() as smtp:
+                await smtp.send_message(message)
+            
             return True
             
         except Exception as e:
-            print(f"Failed to send email to {to_email}: {e}")
+            logger.warning("Failed to send email to %s: %s", to_email, e)
             return False
     
     @staticmethod
@@ -91,13 +150,18 @@ class EmailService:
         attachments: Optional[List[str]] = None
     ) -> Dict[str, any]:
         """
-        Send batch emails with delay between each.
+        Send batch emails through a pool of concurrent workers.
+        
+        Up to SMTP_POOL_SIZE workers pull recipients from a queue and send
+        over pooled SMTP connections. A limiter shared by all workers starts
+        at most one send per delay_seconds, so the configured sending rate is
+        kept without SMTP latency adding to every interval.
         
         Args:
             recipients: List of dicts with 'email', 'subject', 'body'
             subject_template: Subject template (fallback)
             body_template: Body template (fallback)
-            delay_seconds: Delay between emails
+            delay_seconds: Minimum interval between send starts
             attachments: List of file paths to attach
             
         Returns:
@@ -107,36 +171,53 @@ class EmailService:
             delay_seconds = settings.BATCH_EMAIL_DELAY_SECONDS
         
         success_count = 0
-        failed_count = 0
         failed_emails = []
         
+        # Read and encode attachments once for the whole batch
+        attachment_parts = EmailService.build_attachment_parts(attachments)
+        
+        queue: asyncio.Queue = asyncio.Queue()
         for recipient in recipients:
-            email = recipient.get("email")
-            subject = recipient.get("subject", subject_template)
-            body = recipient.get("body", body_template)
-            
-            # Send email
-            success = await EmailService.send_email_smtp(
-                to_email=email,
-                subject=subject,
-                body=body,
-                attachments=attachments
-            )
-            
-            if success:
-                success_count += 1
-            else:
-                failed_count += 1
-                failed_emails.append(email)
-            
-            # Delay between emails (except after last email)
-            if recipient != recipients[-1]:
-                await asyncio.sleep(delay_seconds)
+            queue.put_nowait(recipient)
+        
+        loop = asyncio.get_running_loop()
+        next_send_at = loop.time()
+        
+        async def wait_for_send_slot():
+            # Reserve the next slot before sleeping so workers never share one
+            nonlocal next_send_at
+            now = loop.time()
+            wait = next_send_at - now
+            next_send_at = max(now, next_send_at) + delay_seconds
+            if wait > 0:
+                await asyncio.sleep(wait)
+        
+        async def worker():
+            nonlocal success_count
+            while not queue.empty():
+                recipient = queue.get_nowait()
+                email = recipient.get("email")
+                
+                await wait_for_send_slot()
+                success = await EmailService.send_email_smtp(
+                    to_email=email,
+                    subject=recipient.get("subject", subject_template),
+                    body=recipient.get("body", body_template),
+                    attachment_parts=attachment_parts
+                )
+                
+                if success:
+                    success_count += 1
+                else:
+                    failed_emails.append(email)
+        
+        worker_count = min(max(settings.SMTP_POOL_SIZE, 1), len(recipients))
+        await asyncio.gather(*(worker() for _ in range(worker_count)))
         
         return {
             "total": len(recipients),
             "success": success_count,
-            "failed": failed_count,
+            "failed": len(failed_emails),
             "failed_emails": failed_emails,
             "sent_at": datetime.utcnow().isoformat()
         }
@@ -152,9 +233,7 @@ class EmailService:
         Returns:
             bool: True if valid format
         """
-        import re
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return re.match(pattern, email) is not None
+        return _EMAIL_RE.match(email) is not None
 
 
 # Gmail API implementation (optional - can be extended later)
@@ -1,11 +1,16 @@
 """
 File service for handling file uploads and storage.
 """
+import logging
 import os
 import shutil
+import stat
+import aiofiles
+import aiofiles.os
 from typing import Optional
 from fastapi import UploadFile, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..config import settings
 from ..models.document import Document
 from ..models.user import User
@@ -15,6 +20,11 @@ from ..utils.helpers import (
     generate_unique_filename
 )
 
+logger = logging.getLogger(__name__)
+
+# Upload read/write size (fewer thread hops per file than 64KB)
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
 
 class FileService:
     """Service class for file operations."""
@@ -31,8 +41,7 @@ class FileService:
             bool: True if file type is allowed
         """
         file_ext = get_file_extension(filename)
-        allowed_types = settings.ALLOWED_FILE_TYPES.split(',')
-        return file_ext in allowed_types
+        return file_ext in settings.allowed_file_extensions
     
     @staticmethod
     def validate_file_size(file_size: int) -> bool:
@@ -50,31 +59,42 @@ class FileService:
     @staticmethod
     async def save_upload_file(
         upload_file: UploadFile,
-        destination: str
+        destination: str,
+        max_size: Optional[int] = None
     ) -> int:
         """
-        Save uploaded file to destination.
+        Save uploaded file to destination without blocking the event loop.
         
         Args:
             upload_file: FastAPI UploadFile object
             destination: Destination file path
+            max_size: Stop writing once the upload exceeds this many bytes
             
         Returns:
-            int: File size in bytes
+            int: File size in bytes (greater than max_size if writing stopped early)
         """
-        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        try:
+            buffer = await aiofiles.open(destination, "wb")
+        except FileNotFoundError:
+            # First upload into this directory: create it, then retry
+            await aiofiles.os.makedirs(os.path.dirname(destination), exist_ok=True)
+            buffer = await aiofiles.open(destination, "wb")
         
         file_size = 0
-        with open(destination, "wb") as buffer:
-            while chunk := await upload_file.read(8192):  # Read in 8KB chunks
+        try:
+            while chunk := await upload_file.read(UPLOAD_CHUNK_SIZE):
                 file_size += len(chunk)
-                buffer.write(chunk)
+                if max_size is not None and file_size > max_size:
+                    break
+                await buffer.write(chunk)
+        finally:
+            await buffer.close()
         
         return file_size
     
     @staticmethod
     async def upload_document(
-        db: Session,
+        db: AsyncSession,
         user: User,
         file: UploadFile,
         contact_id: Optional[int] = None,
@@ -83,6 +103,8 @@ class FileService:
         """
         Upload and store a document.
         
+        The document row is flushed but not committed; the caller commits.
+        
         Args:
             db: Database session
             user: Current user
@@ -111,13 +133,13 @@ class FileService:
         user_upload_dir = os.path.join(settings.UPLOAD_DIR, str(user.id))
         file_path = os.path.join(user_upload_dir, unique_filename)
         
-        # Save file
-        file_size = await FileService.save_upload_file(file, file_path)
+        # Save file, giving up as soon as it passes the size limit
+        file_size = await FileService.save_upload_file(file, file_path, settings.MAX_UPLOAD_SIZE)
         
         # Validate file size
         if not FileService.validate_file_size(file_size):
             # Delete the file if it exceeds size limit
-            os.remove(file_path)
+            await aiofiles.os.remove(file_path)
             raise HTTPException(
                 status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
                 detail=f"File too large. Maximum size: {settings.MAX_UPLOAD_SIZE} bytes"
@@ -137,37 +159,54 @@ class FileService:
         )
         
         db.add(document)
-        db.commit()
-        db.refresh(document)
+        await db.flush()
         
         return document
     
     @staticmethod
-    def delete_document(db: Session, document: Document) -> bool:
+    async def delete_document(db: AsyncSession, document_id: int, user_id: int) -> Optional[bool]:
         """
-        Delete a document from database and filesystem.
+        Delete a user's document from database and filesystem.
+        
+        The ownership check and delete run as a single DELETE ... RETURNING.
         
         Args:
             db: Database session
-            document: Document object to delete
+            document_id: Document ID
+            user_id: Owner of the document
             
         Returns:
-            bool: True if successful
+            True if successful, False on error, None if the document was not found
         """
         try:
-            # Delete file from filesystem
-            if os.path.exists(document.file_path):
-                os.remove(document.file_path)
-            
-            # Delete database record
-            db.delete(document)
-            db.commit()
+            # Delete database record, fetching the stored path in the same statement
+            result = await db.execute(
+                delete(Document)
+                .where(Document.id == document_id, Document.user_id == user_id)
+                .returning(Document.file_path)
+            )
+            file_path = result.scalar_one_or_none()
+            if file_path is None:
+                return None
             
-            return True
-        except Exception as e:
-            print(f"Error deleting document: {e}")
-            db.rollback()
+            await db.commit()
+        except Exception:
+            logger.exception("Error deleting document %s", document_id)
+            await db.rollback()
             return False
+        
+        # Remove the file only once the row is gone, so a failed commit never
+        # leaves a record pointing at a missing file (an orphaned file is harmless)
+        try:
+            await aiofiles.os.remove(file_path)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            logger.exception(
+                "Failed to remove file %s of deleted document %s", file_path, document_id
+            )
+        
+        return True
     
     @staticmethod
     def get_document_path(document: Document) -> str:
@@ -182,6 +221,23 @@ class FileService:
         """
         return document.file_path
     
+    @staticmethod
+    def stat_document(document: Document) -> Optional[os.stat_result]:
+        """
+        Stat a document's file, for callers that also need its size/mtime.
+        
+        Args:
+            document: Document object
+            
+        Returns:
+            os.stat_result, or None if the file is missing or not a regular file
+        """
+        try:
+            stat_result = os.stat(document.file_path)
+        except OSError:
+            return None
+        return stat_result if stat.S_ISREG(stat_result.st_mode) else None
+    
     @staticmethod
     def document_exists(document: Document) -> bool:
         """
@@ -193,4 +249,4 @@ class FileService:
         Returns:
             bool: True if file exists
         """
-        return os.path.exists(document.file_path)
+        return FileService.stat_document(document) is not None
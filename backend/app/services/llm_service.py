@@ -1,20 +1,170 @@
 """
 LLM service for AI-powered template personalization using OpenAI.
 """
+import asyncio
+import hashlib
+import logging
+import httpx
 import openai
-from typing import Dict, Optional
+import orjson
+import weakref
+from typing import Dict, List, Optional
+from redis.exceptions import RedisError
 from ..config import settings
 from ..models.contact import Contact
 from ..models.template import Template
-from ..utils.helpers import replace_placeholders
+from ..utils.helpers import extract_placeholders, replace_placeholders
+from ..utils.cache import llm_cache
+from ..utils.redis_client import get_redis, report_redis_error
 
-# Initialize OpenAI client
-openai.api_key = settings.OPENAI_API_KEY
+logger = logging.getLogger(__name__)
+
+# Async OpenAI client (created on first use)
+_client: Optional[openai.AsyncOpenAI] = None
+
+# Maximum concurrent OpenAI requests per event loop (avoids provider 429s)
+LLM_MAX_CONCURRENCY = 10
+_llm_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+# Completions are shared across workers in Redis, keyed by the exact request
+LLM_COMPLETION_TTL_SECONDS = 24 * 60 * 60
+
+# Fixed instructions go in the system message, so every request for the same
+# task starts with an identical prefix (eligible for provider prompt caching);
+# the user message carries only the per-contact details
+SUBJECT_SYSTEM_PROMPT = (
+    "You are a professional email writing assistant helping a graduate student "
+    "personalize an email subject line to a professor.\n\n"
+    "Task: Improve and personalize the subject line to be more engaging and specific "
+    "to the professor's research interests. Keep it professional, concise "
+    "(under 100 characters), and attention-grabbing.\n\n"
+    "Return ONLY the improved subject line, nothing else."
+)
+BODY_SYSTEM_PROMPT = (
+    "You are a professional email writing assistant helping a graduate student "
+    "personalize an email to a professor.\n\n"
+    "Task: Improve and personalize the email to be more engaging, specific to the "
+    "professor's research, and professional. Make it feel genuine and tailored, "
+    "not generic. Keep the same general structure and length.\n\n"
+    "Return ONLY the improved email body, nothing else."
+)
+# Prompt size limits, in characters (~4 per token); tiktoken is not a dependency.
+# Free-text context is cut to a budget. A body the model could not rewrite
+# within its 800-token completion limit is left to placeholder replacement.
+LLM_MAX_CONTEXT_CHARS = 1000
+LLM_MAX_BODY_CHARS = 3000
+
+_CONTACT_CONTEXT = (
+    "Contact Information:\n"
+    "- Name: {name}\n"
+    "- University: {university}\n"
+    "- Department: {department}\n"
+    "- Research Interest: {research_interest}"
+)
+
+
+def get_openai_client() -> openai.AsyncOpenAI:
+    """
+    Get the process-wide async OpenAI client, creating it on first use.
+    
+    All requests share one keep-alive connection pool sized to the
+    concurrency limit, so calls after the first skip DNS and TLS setup.
+    
+    Returns:
+        openai.AsyncOpenAI: Shared client
+    """
+    global _client
+    if _client is None:
+        _client = openai.AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=LLM_MAX_CONCURRENCY,
+                    max_keepalive_connections=LLM_MAX_CONCURRENCY
+                ),
+                timeout=httpx.Timeout(60.0, connect=5.0),
+            ),
+            max_retries=2,
+        )
+    return _client
+
+
+def _get_llm_semaphore() -> asyncio.Semaphore:
+    """Get the request limiter for the running loop (Celery tasks run their own loops)."""
+    loop = asyncio.get_running_loop()
+    semaphore = _llm_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _llm_semaphores[loop] = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    return semaphore
+
+
+async def close_openai_client() -> None:
+    """Close the shared OpenAI client and its connection pool."""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
 
 
 class LLMService:
     """Service class for LLM operations."""
     
+    @staticmethod
+    async def _complete(system_prompt: str, prompt: str, max_tokens: int) -> str:
+        """
+        Run one chat completion under the process-wide concurrency limit.
+        
+        Identical requests (same prompts and parameters) are answered from
+        Redis for LLM_COMPLETION_TTL_SECONDS; Redis errors only skip the cache.
+        
+        Args:
+            system_prompt: Fixed task instructions
+            prompt: User prompt with the per-request details
+            max_tokens: Completion token limit
+            
+        Returns:
+            Stripped completion text
+        """
+        request = {
+            "model": "gpt-4-turbo-preview",
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.7,
+            "max_tokens": max_tokens,
+        }
+        key = "llm:" + hashlib.sha256(orjson.dumps(request, option=orjson.OPT_SORT_KEYS)).hexdigest()
+        
+        try:
+            cached = await get_redis().get(key)
+            if cached is not None:
+                return cached.decode()
+        except RedisError as e:
+            report_redis_error(logger, "LLM completion cache unavailable", e)
+        
+        # Stream the completion: the response is read chunk by chunk as tokens
+        # arrive instead of as one large body once generation finishes
+        parts: List[str] = []
+        async with _get_llm_semaphore():
+            # Closing the stream releases the connection even if iteration fails
+            stream = await get_openai_client().chat.completions.create(**request, stream=True)
+            async with stream:
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        parts.append(chunk.choices[0].delta.content)
+        content = "".join(parts).strip()
+        
+        # Don't pin an empty completion for the whole TTL
+        if content:
+            try:
+                await get_redis().set(key, content, ex=LLM_COMPLETION_TTL_SECONDS)
+            except RedisError as e:
+                report_redis_error(logger, "Failed to cache LLM completion", e)
+        return content
+    
     @staticmethod
     def get_contact_placeholders(contact: Contact) -> Dict[str, str]:
         """
@@ -24,19 +174,9 @@ class LLMService:
             contact: Contact object
             
         Returns:
-            Dictionary of placeholders
+            Dictionary of placeholders (shared; do not modify)
         """
-        return {
-            "ProfName": contact.name,
-            "ProfessorName": contact.name,
-            "Name": contact.name,
-            "Email": contact.email,
-            "University": contact.university,
-            "Department": contact.department or "your department",
-            "ResearchInterest": contact.research_interest or "your research area",
-            "ResearchTopic": contact.research_interest or "your research area",
-            "Website": contact.website or "",
-        }
+        return contact.placeholder_map
     
     @staticmethod
     def personalize_with_placeholders(
@@ -72,6 +212,9 @@ class LLMService:
         """
         Personalize template using AI (OpenAI GPT).
         
+        Results are cached until the template or contact changes, so
+        re-sends and retries do not prompt the model again.
+        
         Args:
             template: Template object
             contact: Contact object
@@ -80,84 +223,59 @@ class LLMService:
         Returns:
             Dictionary with AI-personalized subject and body
         """
+        cache_key = hashlib.blake2b(
+            f"{template.id}:{contact.id}:{template.updated_at}:{contact.updated_at}:{additional_context}".encode(),
+            digest_size=16
+        ).hexdigest()
+        cached = llm_cache.get(cache_key)
+        if cached is not None:
+            return dict(cached)
+        
         # First, do basic placeholder replacement
         base_personalization = LLMService.personalize_with_placeholders(template, contact)
         
-        # Prepare context for AI
-        context = f"""
-        Contact Information:
-        - Name: {contact.name}
-        - University: {contact.university}
-        - Department: {contact.department or 'Not specified'}
-        - Research Interest: {contact.research_interest or 'Not specified'}
-        """
-        
+        # Prepare context for AI (free text cut to the prompt budget)
+        context = _CONTACT_CONTEXT.format(
+            name=contact.name,
+            university=contact.university,
+            department=contact.department or "Not specified",
+            research_interest=(contact.research_interest or "Not specified")[:LLM_MAX_CONTEXT_CHARS]
+        )
         if additional_context:
-            context += f"\n\nAdditional Context:\n{additional_context}"
-        
-        # Create AI prompt for subject
-        subject_prompt = f"""
-        You are helping a graduate student personalize an email subject line to a professor.
-        
-        {context}
-        
-        Original Subject: {base_personalization['subject']}
+            context += "\n\nAdditional Context:\n" + additional_context[:LLM_MAX_CONTEXT_CHARS]
         
-        Task: Improve and personalize this subject line to be more engaging and specific to the professor's research interests. Keep it professional, concise (under 100 characters), and attention-grabbing.
-        
-        Return ONLY the improved subject line, nothing else.
-        """
-        
-        # Create AI prompt for body
-        body_prompt = f"""
-        You are helping a graduate student personalize an email to a professor.
-        
-        {context}
-        
-        Original Email Body:
-        {base_personalization['body']}
-        
-        Task: Improve and personalize this email to be more engaging, specific to the professor's research, and professional. Make it feel genuine and tailored, not generic. Keep the same general structure and length.
+        # Subject and body are independent requests, so run them concurrently
+        requests = {
+            "subject": LLMService._complete(
+                SUBJECT_SYSTEM_PROMPT,
+                context + "\n\nOriginal Subject: " + base_personalization["subject"],
+                max_tokens=100
+            ),
+        }
+        if len(base_personalization["body"]) <= LLM_MAX_BODY_CHARS:
+            requests["body"] = LLMService._complete(
+                BODY_SYSTEM_PROMPT,
+                context + "\n\nOriginal Email Body:\n" + base_personalization["body"],
+                max_tokens=800
+            )
+        else:
+            logger.info("Email body too long for AI personalization; using placeholders only")
+        results = await asyncio.gather(*requests.values(), return_exceptions=True)
         
-        Return ONLY the improved email body, nothing else.
-        """
+        # Fall back to basic placeholder replacement for whichever part failed
+        personalized = dict(base_personalization)
+        failed = False
+        for key, result in zip(requests, results):
+            if isinstance(result, BaseException):
+                logger.warning("AI personalization of %s failed: %s", key, result)
+                failed = True
+            else:
+                personalized[key] = result
         
-        try:
-            # Get AI-improved subject
-            subject_response = openai.chat.completions.create(
-                model="gpt-4-turbo-preview",
-                messages=[
-                    {"role": "system", "content": "You are a professional email writing assistant."},
-                    {"role": "user", "content": subject_prompt}
-                ],
-                temperature=0.7,
-                max_tokens=100,
-            )
-            
-            personalized_subject = subject_response.choices[0].message.content.strip()
-            
-            # Get AI-improved body
-            body_response = openai.chat.completions.create(
-                model="gpt-4-turbo-preview",
-                messages=[
-                    {"role": "system", "content": "You are a professional email writing assistant."},
-                    {"role": "user", "content": body_prompt}
-                ],
-                temperature=0.7,
-                max_tokens=800,
-            )
-            
-            personalized_body = body_response.choices[0].message.content.strip()
-            
-            return {
-                "subject": personalized_subject,
-                "body": personalized_body,
-            }
-            
-        except Exception as e:
-            # If AI fails, fall back to basic placeholder replacement
-            print(f"AI personalization failed: {e}")
-            return base_personalization
+        # Only results without failed requests are cached
+        if not failed:
+            llm_cache[cache_key] = personalized
+        return dict(personalized)
     
     @staticmethod
     async def personalize_template(
@@ -178,7 +296,45 @@ class LLMService:
         Returns:
             Dictionary with personalized subject and body
         """
-        if use_ai or template.use_ai_personalization:
-            return await LLMService.personalize_with_ai(template, contact, additional_context)
-        else:
-            return LLMService.personalize_with_placeholders(template, contact)
+        base = LLMService.personalize_with_placeholders(template, contact)
+        if not (use_ai or template.use_ai_personalization):
+            return base
+        
+        # Skip the model when it has nothing to add: every placeholder is filled
+        # and there is no research interest or extra context to tailor towards
+        if (
+            not contact.research_interest
+            and not additional_context
+            and not extract_placeholders(base["subject"])
+            and not extract_placeholders(base["body"])
+        ):
+            return base
+        
+        return await LLMService.personalize_with_ai(template, contact, additional_context)
+    
+    @staticmethod
+    async def personalize_batch(
+        template: Template,
+        contacts: List[Contact],
+        use_ai: bool = False,
+        concurrency: int = LLM_MAX_CONCURRENCY
+    ) -> List[Dict[str, str]]:
+        """
+        Personalize one template for many contacts concurrently.
+        
+        Args:
+            template: Template object
+            contacts: Contacts to personalize for
+            use_ai: Whether to use AI personalization
+            concurrency: Maximum personalizations in flight at once
+            
+        Returns:
+            Personalized subject/body dictionaries, in contact order
+        """
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+        
+        async def personalize(contact: Contact) -> Dict[str, str]:
+            async with semaphore:
+                return await LLMService.personalize_template(template, contact, use_ai=use_ai)
+        
+        return list(await asyncio.gather(*(personalize(contact) for contact in contacts)))
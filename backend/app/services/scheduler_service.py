@@ -2,14 +2,32 @@
 Scheduler service for managing follow-up emails and scheduled tasks.
 This uses Celery for task scheduling with Redis as the broker.
 """
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown, worker_shutdown
 from datetime import datetime, timedelta
-from typing import Optional
-from sqlalchemy.orm import Session
+from typing import Any, Coroutine, Dict, List, Optional, Set, Tuple
+from sqlalchemy import and_, exists, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..config import settings
 from ..database import SessionLocal
 from ..models.contact import Contact, ContactStatus
 from ..models.activity_log import ActivityLog, ActivityType
+from ..utils.cache import bump_user_version
+
+logger = logging.getLogger(__name__)
+
+# Queue for the network-bound follow-up sends, consumed by its own worker
+FOLLOWUP_QUEUE = "followups"
+
+# Most contacts one follow-up batch task handles (larger backlogs are split)
+FOLLOWUP_BATCH_SIZE = 50
+
+# How long check_pending_followups holds claimed contacts before they can be
+# picked up again (so a failed send is retried on a later run)
+FOLLOWUP_CLAIM_LEASE = timedelta(hours=1)
 
 # Initialize Celery
 celery_app = Celery(
@@ -25,6 +43,19 @@ celery_app.conf.update(
     result_serializer='json',
     timezone='UTC',
     enable_utc=True,
+    # Reuse a bounded set of Redis connections instead of reconnecting per publish
+    broker_pool_limit=10,
+    broker_connection_retry_on_startup=True,
+    broker_transport_options={'max_connections': 20, 'socket_keepalive': True},
+    redis_max_connections=20,
+    # No caller reads task results, so skip the result backend write per task
+    task_ignore_result=True,
+    # Tasks are long (SMTP/LLM round trips); don't hoard them on one worker
+    worker_prefetch_multiplier=1,
+    task_routes={
+        'app.services.scheduler_service.send_followup_email': {'queue': FOLLOWUP_QUEUE},
+        'app.services.scheduler_service.send_followup_batch': {'queue': FOLLOWUP_QUEUE},
+    },
     beat_schedule={
         'check-followups-every-hour': {
             'task': 'app.services.scheduler_service.check_pending_followups',
@@ -33,6 +64,72 @@ celery_app.conf.update(
     },
 )
 
+# Event loop reused by every task run in this worker process
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def run_async(coro: Coroutine[Any, Any, Any]) -> Any:
+    """
+    Run a coroutine to completion on the worker process's event loop.
+    
+    Unlike asyncio.run, the loop outlives the task, so the SMTP pool,
+    OpenAI client and Redis client bound to it are reused by later tasks.
+    If a loop is already running in this thread (a task executed eagerly
+    from async code), the coroutine runs on a helper thread instead of
+    trying to nest event loops.
+    
+    Args:
+        coro: Coroutine to run
+        
+    Returns:
+        The coroutine's result
+    """
+    global _worker_loop
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coro).result()
+    
+    if _worker_loop is None or _worker_loop.is_closed():
+        _worker_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_worker_loop)
+    return _worker_loop.run_until_complete(coro)
+
+
+@worker_process_init.connect
+def _init_worker_loop(**kwargs):
+    """Give each forked pool process its own event loop."""
+    global _worker_loop
+    _worker_loop = None
+    run_async(asyncio.sleep(0))
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def _close_worker_loop(**kwargs):
+    """Close the loop-bound clients and the loop when the worker exits."""
+    global _worker_loop
+    if _worker_loop is None or _worker_loop.is_closed():
+        return
+    
+    from ..services.llm_service import close_openai_client
+    from ..services.smtp_pool import close_smtp_pools
+    from ..utils.redis_client import close_redis
+    
+    async def close_clients() -> None:
+        await close_openai_client()
+        await close_smtp_pools()
+        await close_redis()
+    
+    try:
+        _worker_loop.run_until_complete(close_clients())
+    finally:
+        _worker_loop.close()
+        _worker_loop = None
+
 
 @celery_app.task(name="app.services.scheduler_service.send_followup_email")
 def send_followup_email_task(contact_id: int, user_id: int, template_id: Optional[int] = None):
@@ -50,35 +147,45 @@ def send_followup_email_task(contact_id: int, user_id: int, template_id: Optiona
     
     db = SessionLocal()
     try:
-        # Get contact
-        contact = db.query(Contact).filter(Contact.id == contact_id).first()
-        if not contact:
-            print(f"Contact {contact_id} not found")
+        # Claim the contact like check_pending_followups does, so a follow-up
+        # already claimed by the hourly run, cancelled or rescheduled since this
+        # task was queued is not sent (again)
+        now = datetime.utcnow()
+        claimed = db.execute(
+            update(Contact)
+            .where(
+                Contact.id == contact_id,
+                Contact.user_id == user_id,
+                Contact.status == ContactStatus.FOLLOW_UP_SCHEDULED,
+                Contact.follow_up_date <= now
+            )
+            .values(follow_up_date=now + FOLLOWUP_CLAIM_LEASE)
+            .returning(Contact.id)
+            .execution_options(synchronize_session=False)
+        ).first()
+        db.commit()
+        if not claimed:
+            logger.info("Follow-up for contact %s no longer due, skipping", contact_id)
             return
         
-        # Get template
-        if template_id:
-            template = db.query(Template).filter(
-                Template.id == template_id,
-                Template.user_id == user_id
-            ).first()
-        else:
-            # Get default template
-            template = db.query(Template).filter(
-                Template.user_id == user_id,
-                Template.is_default == True
-            ).first()
-        
+        # Get contact and template (the given one, else the default) in one query
+        template_match = Template.id == template_id if template_id else Template.is_default == True
+        contact, template = db.query(Contact, Template).outerjoin(
+            Template,
+            and_(Template.user_id == user_id, template_match)
+        ).filter(Contact.id == contact_id).one()
         if not template:
-            print(f"No template found for user {user_id}")
+            logger.warning("No template found for user %s", user_id)
+            # Hand the contact back to the hourly run instead of holding it for the lease
+            contact.follow_up_date = now
+            db.commit()
             return
         
         # Personalize email
         personalized = LLMService.personalize_with_placeholders(template, contact)
         
-        # Send email (using synchronous version for Celery task)
-        import asyncio
-        success = asyncio.run(EmailService.send_email_smtp(
+        # Send email on the worker's event loop (keeps pooled SMTP connections)
+        success = run_async(EmailService.send_email_smtp(
             to_email=contact.email,
             subject=f"Follow-up: {personalized['subject']}",
             body=personalized['body']
@@ -88,6 +195,7 @@ def send_followup_email_task(contact_id: int, user_id: int, template_id: Optiona
             # Update contact
             contact.last_contacted_at = datetime.utcnow()
             contact.status = ContactStatus.CONTACTED
+            contact.follow_up_date = None
             
             # Log activity
             activity = ActivityLog(
@@ -100,7 +208,7 @@ def send_followup_email_task(contact_id: int, user_id: int, template_id: Optiona
             db.add(activity)
             db.commit()
             
-            print(f"Follow-up email sent successfully to {contact.email}")
+            logger.info("Follow-up email sent successfully to %s", contact.email)
         else:
             # Log failure
             activity = ActivityLog(
@@ -113,10 +221,125 @@ def send_followup_email_task(contact_id: int, user_id: int, template_id: Optiona
             db.add(activity)
             db.commit()
             
-            print(f"Failed to send follow-up email to {contact.email}")
+            logger.warning("Failed to send follow-up email to %s", contact.email)
+        
+        # Let API workers drop their cached lists and ETags for this user
+        run_async(bump_user_version(user_id))
     
-    except Exception as e:
-        print(f"Error in send_followup_email_task: {e}")
+    except Exception:
+        logger.exception("Error in send_followup_email_task")
+        db.rollback()
+    finally:
+        db.close()
+
+
+@celery_app.task(name="app.services.scheduler_service.send_followup_batch")
+def send_followup_batch_task(
+    user_id: int,
+    contact_ids: List[int],
+    template_id: Optional[int] = None
+):
+    """
+    Celery task to send one user's due follow-up emails together.
+    
+    The template is loaded once, contacts are personalized concurrently
+    (with AI if the template asks for it) and all emails go out over the
+    same pooled SMTP connections.
+    
+    Args:
+        user_id: User ID
+        contact_ids: Contacts to follow up with
+        template_id: Template to use (the user's default if not given)
+    """
+    from ..services.email_service import EmailService
+    from ..services.llm_service import LLMService
+    from ..models.template import Template
+    
+    db = SessionLocal()
+    try:
+        # Get template (resolved by check_pending_followups, else the default)
+        template_match = Template.id == template_id if template_id else Template.is_default == True
+        template = db.query(Template).filter(
+            Template.user_id == user_id,
+            template_match
+        ).first()
+        
+        if not template:
+            logger.warning("No template found for user %s", user_id)
+            return
+        
+        # Contacts whose follow-up was cancelled since they were claimed are skipped
+        contacts = db.query(Contact).filter(
+            Contact.id.in_(contact_ids),
+            Contact.user_id == user_id,
+            Contact.status == ContactStatus.FOLLOW_UP_SCHEDULED
+        ).all()
+        
+        if not contacts:
+            return
+        
+        async def personalize_and_send() -> Tuple[List[Dict[str, str]], Set[str]]:
+            personalized_list = await LLMService.personalize_batch(template, contacts)
+            results = await EmailService.send_batch_emails(
+                recipients=[
+                    {
+                        "email": contact.email,
+                        "subject": f"Follow-up: {personalized['subject']}",
+                        "body": personalized['body']
+                    }
+                    for contact, personalized in zip(contacts, personalized_list)
+                ],
+                subject_template=template.subject,
+                body_template=template.body
+            )
+            return personalized_list, set(results["failed_emails"])
+        
+        personalized_list, failed_emails = run_async(personalize_and_send())
+        
+        # Update sent contacts in one UPDATE and log all activity in one INSERT;
+        # clearing follow_up_date also drops the claim lease (as cancel_followup does)
+        now = datetime.utcnow()
+        sent_ids = []
+        activities = []
+        for contact, personalized in zip(contacts, personalized_list):
+            if contact.email not in failed_emails:
+                sent_ids.append(contact.id)
+                activities.append({
+                    "user_id": user_id,
+                    "contact_id": contact.id,
+                    "activity_type": ActivityType.EMAIL_SENT,
+                    "title": f"Follow-up email sent to {contact.name}",
+                    "description": f"Subject: {personalized['subject']}",
+                    "created_at": now
+                })
+            else:
+                activities.append({
+                    "user_id": user_id,
+                    "contact_id": contact.id,
+                    "activity_type": ActivityType.EMAIL_FAILED,
+                    "title": f"Failed to send follow-up email to {contact.name}",
+                    "description": "Email sending failed",
+                    "created_at": now
+                })
+        
+        if sent_ids:
+            db.execute(
+                update(Contact)
+                .where(Contact.id.in_(sent_ids))
+                .values(status=ContactStatus.CONTACTED, last_contacted_at=now, follow_up_date=None)
+                .execution_options(synchronize_session=False)
+            )
+        db.execute(insert(ActivityLog), activities)
+        db.commit()
+        run_async(bump_user_version(user_id))
+        
+        logger.info(
+            "Follow-up batch for user %s: %d sent, %d failed",
+            user_id, len(contacts) - len(failed_emails), len(failed_emails)
+        )
+    
+    except Exception:
+        logger.exception("Error in send_followup_batch_task")
         db.rollback()
     finally:
         db.close()
@@ -128,26 +351,72 @@ def check_pending_followups():
     Celery periodic task to check for pending follow-ups.
     Runs every hour to check if any contacts need follow-up emails.
     """
+    from ..models.template import Template
+    
     db = SessionLocal()
     try:
-        # Find contacts with follow_up_date in the past and status FOLLOW_UP_SCHEDULED
+        # Claim contacts with follow_up_date in the past and status FOLLOW_UP_SCHEDULED
+        # (users without a default template are skipped) in one UPDATE: pushing the
+        # date out by the lease keeps overlapping runs from dispatching them twice,
+        # and contacts whose send fails are retried once the lease expires
         now = datetime.utcnow()
-        pending_contacts = db.query(Contact).filter(
-            Contact.follow_up_date <= now,
-            Contact.status == ContactStatus.FOLLOW_UP_SCHEDULED
+        pending = db.execute(
+            update(Contact)
+            .where(
+                Contact.follow_up_date <= now,
+                Contact.status == ContactStatus.FOLLOW_UP_SCHEDULED,
+                exists().where(Template.user_id == Contact.user_id, Template.is_default == True)
+            )
+            .values(follow_up_date=now + FOLLOWUP_CLAIM_LEASE)
+            .returning(Contact.id, Contact.user_id)
+            .execution_options(synchronize_session=False)
         ).all()
         
-        print(f"Found {len(pending_contacts)} contacts pending follow-up")
+        template_ids: Dict[int, int] = dict(
+            db.query(Template.user_id, Template.id).filter(
+                Template.user_id.in_({user_id for _, user_id in pending}),
+                Template.is_default == True
+            ).all()
+        ) if pending else {}
         
-        for contact in pending_contacts:
-            # Schedule follow-up email task
-            send_followup_email_task.delay(
-                contact_id=contact.id,
-                user_id=contact.user_id
+        # A default template deleted or unset since the claim: put those contacts
+        # back as due instead of holding them for the whole lease
+        released = [contact_id for contact_id, user_id in pending if user_id not in template_ids]
+        if released:
+            db.execute(
+                update(Contact)
+                .where(Contact.id.in_(released))
+                .values(follow_up_date=now)
+                .execution_options(synchronize_session=False)
             )
+            pending = [
+                (contact_id, user_id) for contact_id, user_id in pending if user_id in template_ids
+            ]
+        db.commit()
+        
+        logger.info("Found %d contacts pending follow-up", len(pending))
+        
+        # Tasks per user share the template, LLM and SMTP connections
+        batches: Dict[Tuple[int, int], List[int]] = {}
+        for contact_id, user_id in pending:
+            batches.setdefault((user_id, template_ids[user_id]), []).append(contact_id)
         
-    except Exception as e:
-        print(f"Error in check_pending_followups: {e}")
+        # Publish every batch over one broker connection and channel
+        with celery_app.producer_or_acquire() as producer:
+            for (user_id, template_id), contact_ids in batches.items():
+                for start in range(0, len(contact_ids), FOLLOWUP_BATCH_SIZE):
+                    send_followup_batch_task.apply_async(
+                        kwargs={
+                            "user_id": user_id,
+                            "contact_ids": contact_ids[start:start + FOLLOWUP_BATCH_SIZE],
+                            "template_id": template_id
+                        },
+                        producer=producer
+                    )
+        
+    except Exception:
+        logger.exception("Error in check_pending_followups")
+        db.rollback()
     finally:
         db.close()
 
@@ -156,8 +425,8 @@ class SchedulerService:
     """Service class for scheduling operations."""
     
     @staticmethod
-    def schedule_followup(
-        db: Session,
+    async def schedule_followup(
+        db: AsyncSession,
         contact: Contact,
         followup_date: datetime,
         template_id: Optional[int] = None
@@ -186,27 +455,29 @@ class SchedulerService:
                 activity_type=ActivityType.FOLLOW_UP_SCHEDULED,
                 title=f"Follow-up scheduled for {contact.name}",
                 description=f"Scheduled for {followup_date.isoformat()}",
-                metadata={"template_id": template_id} if template_id else None
+                meta={"template_id": template_id} if template_id else None
             )
             db.add(activity)
-            db.commit()
+            await db.commit()
             
             # If follow-up is due within next hour, schedule task immediately
             if followup_date <= datetime.utcnow() + timedelta(hours=1):
-                send_followup_email_task.apply_async(
+                # Publishing talks to the broker synchronously; keep it off the event loop
+                await asyncio.to_thread(
+                    send_followup_email_task.apply_async,
                     args=[contact.id, contact.user_id, template_id],
                     eta=followup_date
                 )
             
             return True
             
-        except Exception as e:
-            print(f"Error scheduling follow-up: {e}")
-            db.rollback()
+        except Exception:
+            logger.exception("Error scheduling follow-up")
+            await db.rollback()
             return False
     
     @staticmethod
-    def cancel_followup(db: Session, contact: Contact) -> bool:
+    async def cancel_followup(db: AsyncSession, contact: Contact) -> bool:
         """
         Cancel a scheduled follow-up.
         
@@ -222,10 +493,10 @@ class SchedulerService:
             if contact.status == ContactStatus.FOLLOW_UP_SCHEDULED:
                 contact.status = ContactStatus.CONTACTED
             
-            db.commit()
+            await db.commit()
             return True
             
-        except Exception as e:
-            print(f"Error cancelling follow-up: {e}")
-            db.rollback()
+        except Exception:
+            logger.exception("Error cancelling follow-up")
+            await db.rollback()
             return False
@@ -0,0 +1,174 @@
+"""
+Process-lifetime SMTP connection pool.
+
+Keeps up to SMTP_POOL_SIZE authenticated aiosmtplib clients per
+(host, port, username) so that sends from API requests, background tasks
+and batches skip the TCP/STARTTLS/login handshake. Each connection is
+retired and reopened after SMTP_MAX_MSGS_PER_CONN messages, after a send
+error, or when it fails a health check.
+"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Tuple
+import aiosmtplib
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Idle connections older than this are checked with NOOP before reuse
+IDLE_CHECK_SECONDS = 30
+
+
+class _PooledConnection:
+    """An open SMTP client plus its usage bookkeeping."""
+
+    def __init__(self, smtp: aiosmtplib.SMTP, opened_at: float):
+        self.smtp = smtp
+        self.sent = 0
+        self.last_used = opened_at
+
+
+class SMTPConnectionPool:
+    """Fixed-size pool of SMTP connections for one server and account."""
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        username: str,
+        password: str,
+        size: int,
+        max_messages: int
+    ):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.max_messages = max_messages
+        self.loop = asyncio.get_running_loop()
+
+        # Empty slots (None) are connected lazily on first use
+        self._slots: asyncio.Queue = asyncio.Queue()
+        for _ in range(max(size, 1)):
+            self._slots.put_nowait(None)
+
+    async def _open(self) -> _PooledConnection:
+        """Open, STARTTLS and authenticate a new connection."""
+        smtp = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            username=self.username,
+            password=self.password,
+            start_tls=True,
+        )
+        await smtp.connect()
+        return _PooledConnection(smtp, self.loop.time())
+
+    @staticmethod
+    async def _close(conn: Optional[_PooledConnection]) -> None:
+        """Close a connection, ignoring errors from an already broken one."""
+        if conn is None:
+            return
+        try:
+            await conn.smtp.quit()
+        except Exception:
+            conn.smtp.close()
+
+    async def _is_healthy(self, conn: _PooledConnection) -> bool:
+        """Check that a pooled connection can still be used."""
+        if not conn.smtp.is_connected or conn.sent >= self.max_messages:
+            return False
+        if self.loop.time() - conn.last_used < IDLE_CHECK_SECONDS:
+            return True
+        try:
+            await conn.smtp.noop()
+            return True
+        except Exception:
+            return False
+
+    async def warm_up(self) -> None:
+        """Open every empty slot ahead of the first send (best effort)."""
+        slots = [self._slots.get_nowait() for _ in range(self._slots.qsize())]
+        try:
+            for index, conn in enumerate(slots):
+                if conn is None:
+                    slots[index] = await self._open()
+        except Exception as e:
+            logger.warning("Failed to pre-warm SMTP pool for %s: %s", self.hostname, e)
+        finally:
+            for conn in slots:
+                self._slots.put_nowait(conn)
+
+    @asynccontextmanager
+    async def get(self) -> AsyncIterator[aiosmtplib.SMTP]:
+        """
+        Borrow a connection for sending one message.
+
+        Yields:
+            aiosmtplib.SMTP: Connected and authenticated client
+
+        Raises:
+            Exception: Any connection or send error; the connection is discarded
+        """
+        conn = await self._slots.get()
+        try:
+            if conn is not None and not await self._is_healthy(conn):
+                await self._close(conn)
+                conn = None
+            if conn is None:
+                conn = await self._open()
+
+            yield conn.smtp
+
+            conn.sent += 1
+            conn.last_used = self.loop.time()
+        except BaseException:
+            # Connection state is unknown after an error; reopen on next use
+            await self._close(conn)
+            conn = None
+            raise
+        finally:
+            self._slots.put_nowait(conn)
+
+    async def close(self) -> None:
+        """Close all idle connections in the pool."""
+        while not self._slots.empty():
+            await self._close(self._slots.get_nowait())
+
+
+_pools: Dict[Tuple[str, int, str], SMTPConnectionPool] = {}
+
+
+def get_smtp_pool() -> SMTPConnectionPool:
+    """
+    Get the pool for the configured SMTP server, creating it if needed.
+
+    Pools are bound to the event loop that created them; callers running
+    their own loop (e.g. Celery tasks using asyncio.run) get a fresh pool.
+
+    Returns:
+        SMTPConnectionPool: Pool for the current settings
+    """
+    key = (settings.SMTP_HOST, settings.SMTP_PORT, settings.SMTP_USERNAME)
+    pool = _pools.get(key)
+    if pool is None or pool.loop is not asyncio.get_running_loop():
+        pool = SMTPConnectionPool(
+            hostname=settings.SMTP_HOST,
+            port=settings.SMTP_PORT,
+            username=settings.SMTP_USERNAME,
+            password=settings.SMTP_PASSWORD,
+            size=settings.SMTP_POOL_SIZE,
+            max_messages=settings.SMTP_MAX_MSGS_PER_CONN,
+        )
+        _pools[key] = pool
+    return pool
+
+
+async def close_smtp_pools() -> None:
+    """Close every pool created on the running event loop."""
+    loop = asyncio.get_running_loop()
+    for key, pool in list(_pools.items()):
+        if pool.loop is loop:
+            await pool.close()
+            del _pools[key]
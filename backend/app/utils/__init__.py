@@ -14,6 +14,9 @@ from .helpers import (
     get_file_extension,
     format_file_size,
     generate_unique_filename,
+    encode_cursor,
+    decode_cursor,
+    escape_like,
 )
 
 __all__ = [
@@ -27,4 +30,7 @@ __all__ = [
     "get_file_extension",
     "format_file_size",
     "generate_unique_filename",
+    "encode_cursor",
+    "decode_cursor",
+    "escape_like",
 ]
@@ -0,0 +1,134 @@
+"""
+In-process caching utilities.
+
+Every user has a data version that write endpoints bump after committing.
+Cache keys include that version, so a write immediately makes the user's
+previous entries unreachable. The shared part of the version lives in Redis,
+so writes made by other worker processes and Celery tasks are seen too; the
+TTL only bounds staleness while Redis is unavailable.
+"""
+import logging
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+from cachetools import TTLCache
+from redis.exceptions import RedisError
+from .redis_client import get_redis, report_redis_error
+
+logger = logging.getLogger(__name__)
+
+# Total row counts for paginated list endpoints
+count_cache: TTLCache = TTLCache(maxsize=10_000, ttl=30)
+
+# Fully built responses for read-heavy dashboard/summary endpoints
+response_cache: TTLCache = TTLCache(maxsize=10_000, ttl=60)
+
+# Authenticated users by (ID, account version) (detached ORM instances, read-only)
+user_cache: TTLCache = TTLCache(maxsize=50_000, ttl=30)
+
+# AI-personalized emails keyed by template/contact versions (see LLMService)
+llm_cache: TTLCache = TTLCache(maxsize=4096, ttl=24 * 60 * 60)
+
+# Per-user data versions used to invalidate cache entries
+_user_versions: Dict[int, int] = {}
+
+# Redis key of a user's shared data version; idle counters expire (cache
+# entries and ETag windows are far shorter, so a reset cannot collide)
+USER_VERSION_KEY = "user_version:{}"
+USER_VERSION_TTL_SECONDS = 7 * 24 * 60 * 60
+
+# (user_id, shared data version) read by get_user_auth_version for the
+# current request, so the cache and ETag lookups after it skip a round trip
+_request_user_version: ContextVar[Optional[Tuple[int, int]]] = ContextVar(
+    "request_user_version", default=None
+)
+
+
+async def get_shared_user_version(user_id: int) -> str:
+    """
+    Get a user's data version as seen by every worker process.
+
+    Combines the Redis counter (bumped by all API workers and Celery tasks)
+    with this process's own counter, so local writes are seen even while
+    Redis is unavailable. Within a request the Redis counter read by
+    get_user_auth_version is reused.
+
+    Args:
+        user_id: User ID
+
+    Returns:
+        str: Version token ("<shared>.<local>")
+    """
+    local = _user_versions.get(user_id, 0)
+    fetched = _request_user_version.get()
+    if fetched is not None and fetched[0] == user_id:
+        return f"{fetched[1]}.{local}"
+    try:
+        shared = await get_redis().get(USER_VERSION_KEY.format(user_id))
+    except RedisError as e:
+        report_redis_error(logger, "Shared user version unavailable", e)
+        # Only this worker's writes change the token now: writes through other
+        # workers or Celery stay invisible to count_cache/response_cache entries
+        # and ETags until their TTL (30s/60s) or ETAG_WINDOW_SECONDS runs out
+        return f"-.{local}"
+    return f"{int(shared or 0)}.{local}"
+
+
+async def bump_user_version(user_id: int) -> None:
+    """
+    Invalidate a user's cached entries in every worker by incrementing their data version.
+
+    Args:
+        user_id: User ID
+    """
+    _user_versions[user_id] = _user_versions.get(user_id, 0) + 1
+
+    key = USER_VERSION_KEY.format(user_id)
+    try:
+        async with get_redis().pipeline(transaction=True) as pipe:
+            await pipe.incr(key).expire(key, USER_VERSION_TTL_SECONDS).execute()
+    except RedisError as e:
+        report_redis_error(logger, "Failed to bump shared user version", e)
+
+
+# Redis key of a user's account version, bumped when the account itself
+# changes so every worker stops serving its cached User
+USER_AUTH_VERSION_KEY = "user_auth_version:{}"
+
+
+async def get_user_auth_version(user_id: int) -> Optional[int]:
+    """
+    Get a user's shared account version for keying user_cache.
+
+    The user's shared data version is fetched in the same MGET and kept for
+    the rest of the request (see get_shared_user_version).
+
+    Args:
+        user_id: User ID
+
+    Returns:
+        Optional[int]: Current version, or None if Redis is unavailable
+    """
+    try:
+        auth_version, data_version = await get_redis().mget(
+            USER_AUTH_VERSION_KEY.format(user_id), USER_VERSION_KEY.format(user_id)
+        )
+    except RedisError as e:
+        report_redis_error(logger, "Shared user auth version unavailable", e)
+        return None
+    _request_user_version.set((user_id, int(data_version or 0)))
+    return int(auth_version or 0)
+
+
+async def bump_user_auth_version(user_id: int) -> None:
+    """
+    Invalidate the cached User in every worker after the account changes.
+
+    Args:
+        user_id: User ID
+    """
+    key = USER_AUTH_VERSION_KEY.format(user_id)
+    try:
+        async with get_redis().pipeline(transaction=True) as pipe:
+            await pipe.incr(key).expire(key, USER_VERSION_TTL_SECONDS).execute()
+    except RedisError as e:
+        report_redis_error(logger, "Failed to bump shared user auth version", e)
@@ -2,9 +2,32 @@
 Helper utility functions for various operations.
 """
 import re
-from typing import Dict, Any
+import base64
+import binascii
+from functools import lru_cache
+from typing import Dict, Any, Optional, Tuple
 from datetime import datetime
 
+# [PlaceholderName] tokens found by extract_placeholders
+_PLACEHOLDER_RE = re.compile(r'\[(\w+)\]')
+
+# Units used by format_file_size, each 1024 times the previous
+_FILE_SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+
+# Characters sanitize_filename removes
+_FILENAME_INVALID_RE = re.compile(r'[^\w\s.-]')
+
+# The same rule as a deletion table, for the common all-ASCII filename
+_FILENAME_ASCII_DELETE = str.maketrans(
+    "", "", "".join(chr(code) for code in range(128) if _FILENAME_INVALID_RE.match(chr(code)))
+)
+
+
+@lru_cache(maxsize=128)
+def _placeholder_pattern(keys: Tuple[str, ...]) -> re.Pattern:
+    """Compile one case-insensitive pattern matching any of the given [Key] placeholders."""
+    return re.compile(r"\[(" + "|".join(re.escape(key) for key in keys) + r")\]", re.IGNORECASE)
+
 
 def replace_placeholders(text: str, placeholders: Dict[str, str]) -> str:
     """
@@ -19,11 +42,14 @@ def replace_placeholders(text: str, placeholders: Dict[str, str]) -> str:
     Returns:
         str: Text with placeholders replaced
     """
-    result = text
-    for key, value in placeholders.items():
-        pattern = f"\\[{key}\\]"
-        result = re.sub(pattern, str(value), result, flags=re.IGNORECASE)
-    return result
+    # Fast path: nothing that could be a placeholder
+    if not placeholders or "[" not in text:
+        return text
+    
+    # Single pass over the text; values are inserted literally and never rescanned
+    values = {key.lower(): str(value) for key, value in placeholders.items()}
+    pattern = _placeholder_pattern(tuple(placeholders))
+    return pattern.sub(lambda match: values[match.group(1).lower()], text)
 
 
 def extract_placeholders(text: str) -> list[str]:
@@ -36,9 +62,9 @@ def extract_placeholders(text: str) -> list[str]:
     Returns:
         list: List of placeholder names found
     """
-    pattern = r'\[(\w+)\]'
-    matches = re.findall(pattern, text)
-    return list(set(matches))
+    if "[" not in text:
+        return []
+    return list(set(_PLACEHOLDER_RE.findall(text)))
 
 
 def sanitize_filename(filename: str) -> str:
@@ -54,8 +80,11 @@ def sanitize_filename(filename: str) -> str:
     # Remove path components
     filename = filename.split('\\')[-1].split('/')[-1]
     
-    # Remove invalid characters
-    filename = re.sub(r'[^\w\s.-]', '', filename)
+    # Remove invalid characters (translate avoids the regex for ASCII names)
+    if filename.isascii():
+        filename = filename.translate(_FILENAME_ASCII_DELETE)
+    else:
+        filename = _FILENAME_INVALID_RE.sub('', filename)
     
     # Limit length
     if len(filename) > 255:
@@ -90,11 +119,12 @@ def format_file_size(size_bytes: int) -> str:
     Returns:
         str: Formatted size (e.g., '1.5 MB')
     """
-    for unit in ['B', 'KB', 'MB', 'GB']:
-        if size_bytes < 1024.0:
-            return f"{size_bytes:.1f} {unit}"
-        size_bytes /= 1024.0
-    return f"{size_bytes:.1f} TB"
+    if size_bytes < 1024:
+        return f"{size_bytes:.1f} B"
+    
+    # Each unit is 2**10 times the previous one, so the bit length picks it
+    unit_index = min((int(size_bytes).bit_length() - 1) // 10, len(_FILE_SIZE_UNITS) - 1)
+    return f"{size_bytes / (1 << (10 * unit_index)):.1f} {_FILE_SIZE_UNITS[unit_index]}"
 
 
 def generate_unique_filename(original_filename: str) -> str:
@@ -111,3 +141,54 @@ def generate_unique_filename(original_filename: str) -> str:
     name, ext = original_filename.rsplit('.', 1) if '.' in original_filename else (original_filename, '')
     sanitized_name = re.sub(r'[^\w\s-]', '', name)[:50]
     return f"{sanitized_name}_{timestamp}.{ext}" if ext else f"{sanitized_name}_{timestamp}"
+
+
+def encode_cursor(created_at: datetime, item_id: int) -> str:
+    """
+    Encode a keyset pagination cursor from the last item of a page.
+    
+    Args:
+        created_at: Creation timestamp of the last item
+        item_id: ID of the last item
+        
+    Returns:
+        str: Opaque URL-safe cursor string
+    """
+    raw = f"{created_at.isoformat()}|{item_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Optional[Tuple[datetime, int]]:
+    """
+    Decode a keyset pagination cursor.
+    
+    Args:
+        cursor: Cursor string produced by encode_cursor
+        
+    Returns:
+        Tuple of (created_at, id) or None if the cursor is invalid
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, item_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(item_id)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        return None
+
+
+def escape_like(value: str, escape_char: str = "\\") -> str:
+    """
+    Escape LIKE/ILIKE wildcards so user input matches literally.
+    
+    Args:
+        value: Raw search text
+        escape_char: Escape character passed as the ESCAPE clause
+        
+    Returns:
+        str: Text with the escape character, % and _ escaped
+    """
+    return (
+        value.replace(escape_char, escape_char * 2)
+        .replace("%", escape_char + "%")
+        .replace("_", escape_char + "_")
+    )
@@ -0,0 +1,52 @@
+"""
+Application logging setup.
+
+Records from the `app.*` loggers are handed to a background thread through
+a queue, so writing log lines to stderr never blocks the event loop.
+"""
+import logging
+import logging.handlers
+import queue
+import sys
+from typing import Optional
+from ..config import settings
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.handlers.QueueHandler] = None
+
+
+def start_logging() -> None:
+    """Attach the queue handler to the `app` logger and start its writer thread (idempotent)."""
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    _queue_handler = logging.handlers.QueueHandler(log_queue)
+    logger = logging.getLogger("app")
+    logger.addHandler(_queue_handler)
+    logger.setLevel(logging.DEBUG if settings.DEBUG else logging.INFO)
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the writer thread."""
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+
+    _listener.stop()
+    logger = logging.getLogger("app")
+    logger.removeHandler(_queue_handler)
+    logger.propagate = True
+
+    _listener = None
+    _queue_handler = None
@@ -0,0 +1,86 @@
+"""
+Shared asyncio Redis client for request-path features (rate limiting,
+idempotency keys, shared cache versions). Celery talks to Redis on its own.
+
+After a connection failure Redis is skipped for REDIS_BACKOFF_SECONDS, so
+requests do not each wait out the socket timeout (and log) while it is down.
+"""
+import logging
+import time
+from typing import Optional
+from redis import asyncio as aioredis
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import RedisError, TimeoutError as RedisTimeoutError
+from ..config import settings
+
+REDIS_BACKOFF_SECONDS = 5
+
+_client: Optional[aioredis.Redis] = None
+
+# Monotonic time until which get_redis() fails fast after a connection failure
+_unavailable_until = 0.0
+
+
+class RedisBackoff(RedisConnectionError):
+    """Raised by get_redis() while Redis is skipped after a recent failure."""
+
+
+def get_redis() -> aioredis.Redis:
+    """
+    Get the process-wide Redis client, creating it on first use.
+
+    Short timeouts keep requests responsive if Redis is unavailable;
+    callers treat Redis errors as "feature disabled" rather than failing
+    and pass them to report_redis_error.
+
+    Returns:
+        aioredis.Redis: Client for settings.REDIS_URL
+
+    Raises:
+        RedisBackoff: If a connection failure was reported within REDIS_BACKOFF_SECONDS
+    """
+    global _client
+    if time.monotonic() < _unavailable_until:
+        raise RedisBackoff("Redis unavailable, retrying shortly")
+    if _client is None:
+        _client = aioredis.from_url(
+            settings.REDIS_URL,
+            socket_connect_timeout=0.5,
+            socket_timeout=0.5,
+        )
+    return _client
+
+
+def report_redis_error(log: logging.Logger, message: str, exc: RedisError) -> None:
+    """
+    Log a Redis failure, backing off from Redis after connection errors.
+
+    A connection failure or timeout makes get_redis() fail fast for
+    REDIS_BACKOFF_SECONDS and is logged once for that period; errors raised
+    during the backoff are not logged again.
+
+    Args:
+        log: Logger of the calling module
+        message: What was skipped or failed
+        exc: The Redis error
+    """
+    global _unavailable_until
+    if isinstance(exc, RedisBackoff):
+        return
+    if not isinstance(exc, (RedisConnectionError, RedisTimeoutError)):
+        log.warning("%s: %s", message, exc)
+        return
+
+    now = time.monotonic()
+    if now < _unavailable_until:
+        return
+    _unavailable_until = now + REDIS_BACKOFF_SECONDS
+    log.warning("%s: %s (skipping Redis for %ds)", message, exc, REDIS_BACKOFF_SECONDS)
+
+
+async def close_redis() -> None:
+    """Close the shared Redis client and its connection pool."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,31 @@
+"""
+JSON response class rendered with orjson.
+
+Endpoints that return an instance of this class directly skip FastAPI's
+response_model validation and jsonable_encoder pass; orjson serializes
+datetimes, enums and nested dicts/lists natively.
+"""
+from enum import Enum
+from typing import Any
+import orjson
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+
+def _default(obj: Any) -> Any:
+    """Serialize the types orjson does not handle natively."""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(by_alias=True)
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class ORJSONResponse(Response):
+    """JSON response serialized with orjson (with pydantic model support)."""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
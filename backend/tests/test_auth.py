@@ -2,8 +2,8 @@
 Test authentication service.
 """
 import pytest
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from app.database import Base
 from app.models.user import User
 from app.schemas.user import UserCreate
@@ -11,24 +11,27 @@ from app.services.auth_service import AuthService
 
 
 # Test database setup
-TEST_DATABASE_URL = "sqlite:///./test.db"
-engine = create_engine(TEST_DATABASE_URL, connect_args={"check_same_thread": False})
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+TEST_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
+engine = create_async_engine(TEST_DATABASE_URL)
+TestingSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False, bind=engine)
 
 
-@pytest.fixture
-def db_session():
+@pytest_asyncio.fixture
+async def db_session():
     """Create a fresh database for each test."""
-    Base.metadata.create_all(bind=engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
     db = TestingSessionLocal()
     try:
         yield db
     finally:
-        db.close()
-        Base.metadata.drop_all(bind=engine)
+        await db.close()
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
 
 
-def test_create_user(db_session):
+@pytest.mark.asyncio
+async def test_create_user(db_session):
     """Test user creation."""
     user_data = UserCreate(
         email="test@example.com",
@@ -37,7 +40,7 @@ def test_create_user(db_session):
         full_name="Test User"
     )
     
-    user = AuthService.create_user(db_session, user_data)
+    user = await AuthService.create_user(db_session, user_data)
     
     assert user.email == "test@example.com"
     assert user.username == "testuser"
@@ -46,7 +49,8 @@ def test_create_user(db_session):
     assert user.hashed_password != "password123"  # Should be hashed
 
 
-def test_authenticate_user(db_session):
+@pytest.mark.asyncio
+async def test_authenticate_user(db_session):
     """Test user authentication."""
     # Create user
     user_data = UserCreate(
@@ -54,28 +58,29 @@ def test_authenticate_user(db_session):
         username="testuser",
         password="password123"
     )
-    AuthService.create_user(db_session, user_data)
+    await AuthService.create_user(db_session, user_data)
     
     # Authenticate with correct credentials
-    user = AuthService.authenticate_user(db_session, "testuser", "password123")
+    user = await AuthService.authenticate_user(db_session, "testuser", "password123")
     assert user is not None
     assert user.username == "testuser"
     
     # Authenticate with wrong password
-    user = AuthService.authenticate_user(db_session, "testuser", "wrongpassword")
+    user = await AuthService.authenticate_user(db_session, "testuser", "wrongpassword")
     assert user is None
 
 
-def test_get_user_by_email(db_session):
+@pytest.mark.asyncio
+async def test_get_user_by_email(db_session):
     """Test getting user by email."""
     user_data = UserCreate(
         email="test@example.com",
         username="testuser",
         password="password123"
     )
-    created_user = AuthService.create_user(db_session, user_data)
+    created_user = await AuthService.create_user(db_session, user_data)
     
-    user = AuthService.get_user_by_email(db_session, "test@example.com")
+    user = await AuthService.get_user_by_email(db_session, "test@example.com")
     assert user is not None
     assert user.id == created_user.id
     assert user.email == "test@example.com"
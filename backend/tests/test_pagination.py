@@ -0,0 +1,189 @@
+"""
+Test keyset pagination of the contact and activity lists.
+"""
+from datetime import datetime, timedelta
+import orjson
+import pytest
+import pytest_asyncio
+from fastapi import Response
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app.database import Base
+from app.models.user import User
+from app.models.contact import Contact, ContactStatus
+from app.models.activity_log import ActivityLog, ActivityType
+from app.api.contacts import list_contacts
+from app.api.dashboard import get_activity_logs
+from app.api.deps import get_pagination_cursor
+from app.utils.cache import count_cache
+
+
+# Test database setup
+TEST_DATABASE_URL = "sqlite+aiosqlite:///./test_pagination.db"
+engine = create_async_engine(TEST_DATABASE_URL)
+TestingSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False, bind=engine)
+
+
+@pytest_asyncio.fixture
+async def db_session():
+    """Create a fresh database (and empty count cache) for each test."""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    count_cache.clear()
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        await db.close()
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+
+
+@pytest_asyncio.fixture
+async def user(db_session):
+    """Create the user whose rows are listed."""
+    user = User(email="test@example.com", username="testuser", hashed_password="x")
+    db_session.add(user)
+    await db_session.commit()
+    return user
+
+
+async def add_contacts(db, user, created_at_values):
+    """Add one contact per creation timestamp and return their IDs."""
+    contacts = [
+        Contact(
+            user_id=user.id,
+            name=f"Prof {i}",
+            email=f"prof{i}@uni.edu",
+            university="University",
+            status=ContactStatus.CONTACTED if i % 2 else ContactStatus.NEW,
+            created_at=created_at
+        )
+        for i, created_at in enumerate(created_at_values)
+    ]
+    db.add_all(contacts)
+    await db.commit()
+    return [contact.id for contact in contacts]
+
+
+async def fetch_contacts(db, user, cursor=None, page_size=2, status=None):
+    """Call the contact list endpoint and decode its JSON body."""
+    response = await list_contacts(
+        response=Response(),
+        cursor=get_pagination_cursor(cursor),
+        page_size=page_size,
+        status=status,
+        search=None,
+        current_user=user,
+        db=db
+    )
+    return orjson.loads(response.body)
+
+
+async def fetch_all_contact_pages(db, user, page_size=2, status=None):
+    """Follow next_cursor until the last page; return every page."""
+    pages = [await fetch_contacts(db, user, page_size=page_size, status=status)]
+    while pages[-1]["next_cursor"] is not None:
+        pages.append(await fetch_contacts(
+            db, user, cursor=pages[-1]["next_cursor"], page_size=page_size, status=status
+        ))
+    return pages
+
+
+@pytest.mark.asyncio
+async def test_cursor_round_trip(db_session, user):
+    """Test that following next_cursor visits every contact once, newest first."""
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    ids = await add_contacts(db_session, user, [start + timedelta(minutes=i) for i in range(5)])
+    
+    pages = await fetch_all_contact_pages(db_session, user, page_size=2)
+    
+    assert [len(page["contacts"]) for page in pages] == [2, 2, 1]
+    assert [c["id"] for page in pages for c in page["contacts"]] == list(reversed(ids))
+    assert pages[-1]["next_cursor"] is None
+    assert all(page["total"] == 5 for page in pages)
+
+
+@pytest.mark.asyncio
+async def test_last_page_has_no_cursor(db_session, user):
+    """Test next_cursor is None when the page is exactly full or the list is empty."""
+    empty = await fetch_contacts(db_session, user)
+    assert empty["contacts"] == []
+    assert empty["total"] == 0
+    assert empty["next_cursor"] is None
+    
+    start = datetime(2024, 1, 1)
+    await add_contacts(db_session, user, [start + timedelta(minutes=i) for i in range(2)])
+    count_cache.clear()
+    
+    page = await fetch_contacts(db_session, user, page_size=2)
+    assert len(page["contacts"]) == 2
+    assert page["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_ties_on_created_at(db_session, user):
+    """Test that contacts sharing created_at are split across pages without gaps or repeats."""
+    same_time = datetime(2024, 1, 1, 12, 0, 0)
+    ids = await add_contacts(db_session, user, [same_time] * 5)
+    
+    pages = await fetch_all_contact_pages(db_session, user, page_size=2)
+    
+    # Ties are ordered by ID, descending
+    assert [c["id"] for page in pages for c in page["contacts"]] == sorted(ids, reverse=True)
+
+
+@pytest.mark.asyncio
+async def test_total_with_filter_and_uncached_later_page(db_session, user):
+    """Test the window-count total on the first page and the COUNT on a later page."""
+    start = datetime(2024, 1, 1)
+    await add_contacts(db_session, user, [start + timedelta(minutes=i) for i in range(7)])
+    
+    first = await fetch_contacts(db_session, user, page_size=2, status=ContactStatus.NEW)
+    assert first["total"] == 4
+    assert all(c["status"] == ContactStatus.NEW.value for c in first["contacts"])
+    
+    # A later page without a cached total counts the whole filtered set, not the rest
+    count_cache.clear()
+    second = await fetch_contacts(
+        db_session, user, cursor=first["next_cursor"], page_size=2, status=ContactStatus.NEW
+    )
+    assert second["total"] == 4
+    assert second["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_activity_cursor_round_trip(db_session, user):
+    """Test keyset pagination of the activity feed, including tied timestamps."""
+    same_time = datetime(2024, 1, 1)
+    logs = [
+        ActivityLog(
+            user_id=user.id,
+            activity_type=ActivityType.EMAIL_SENT,
+            title=f"Email {i}",
+            created_at=same_time
+        )
+        for i in range(3)
+    ]
+    db_session.add_all(logs)
+    await db_session.commit()
+    
+    seen = []
+    cursor = None
+    while True:
+        response = await get_activity_logs(
+            response=Response(),
+            cursor=get_pagination_cursor(cursor),
+            page_size=2,
+            activity_type=None,
+            contact_id=None,
+            current_user=user,
+            db=db_session
+        )
+        page = orjson.loads(response.body)
+        assert page["total"] == 3
+        seen.extend(log["id"] for log in page["logs"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    
+    assert seen == sorted((log.id for log in logs), reverse=True)
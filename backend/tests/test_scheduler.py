@@ -0,0 +1,213 @@
+"""
+Test follow-up claiming and batch sending.
+"""
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models.user import User
+from app.models.contact import Contact, ContactStatus
+from app.models.template import Template
+from app.models.activity_log import ActivityLog, ActivityType
+from app.services import scheduler_service
+from app.services.email_service import EmailService
+
+
+# Test database setup (Celery tasks use synchronous sessions)
+TEST_DATABASE_URL = "sqlite:///./test_scheduler.db"
+engine = create_engine(TEST_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def db_session(monkeypatch):
+    """Create a fresh database for each test and point the tasks at it."""
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(scheduler_service, "SessionLocal", TestingSessionLocal)
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        scheduler_service._close_worker_loop()
+        Base.metadata.drop_all(engine)
+
+
+@pytest.fixture
+def dispatched(monkeypatch):
+    """Record batch tasks published by check_pending_followups instead of sending them."""
+    calls = []
+    monkeypatch.setattr(
+        scheduler_service.send_followup_batch_task,
+        "apply_async",
+        lambda kwargs, producer=None: calls.append(kwargs)
+    )
+    return calls
+
+
+@pytest.fixture
+def smtp(monkeypatch):
+    """Fake batch sender; addresses added to `failing` are reported as failed."""
+    sent = []
+    failing = set()
+    
+    async def send_batch_emails(recipients, subject_template, body_template, **kwargs):
+        failed = [r["email"] for r in recipients if r["email"] in failing]
+        sent.extend(r["email"] for r in recipients if r["email"] not in failing)
+        return {
+            "success": len(recipients) - len(failed),
+            "failed": len(failed),
+            "failed_emails": failed
+        }
+    
+    monkeypatch.setattr(EmailService, "send_batch_emails", staticmethod(send_batch_emails))
+    return sent, failing
+
+
+def create_user_with_due_contacts(db, username, count, with_template=True):
+    """Create a user, optionally a default template, and contacts due for follow-up."""
+    user = User(email=f"{username}@example.com", username=username, hashed_password="x")
+    db.add(user)
+    db.commit()
+    
+    if with_template:
+        db.add(Template(
+            user_id=user.id,
+            name="Default",
+            subject="Hello [Name]",
+            body="Dear [Name]",
+            is_default=True
+        ))
+    
+    due = datetime.utcnow() - timedelta(hours=1)
+    contacts = [
+        Contact(
+            user_id=user.id,
+            name=f"Prof {username} {i}",
+            email=f"prof{i}@{username}.edu",
+            university="University",
+            status=ContactStatus.FOLLOW_UP_SCHEDULED,
+            follow_up_date=due
+        )
+        for i in range(count)
+    ]
+    db.add_all(contacts)
+    db.commit()
+    return user, contacts
+
+
+def test_second_run_does_not_redispatch(db_session, dispatched):
+    """Test that claimed contacts are dispatched once, grouped per user."""
+    user, contacts = create_user_with_due_contacts(db_session, "alice", 2)
+    create_user_with_due_contacts(db_session, "bob", 1, with_template=False)
+    template = db_session.query(Template).filter(Template.user_id == user.id).one()
+    
+    scheduler_service.check_pending_followups()
+    
+    assert dispatched == [{
+        "user_id": user.id,
+        "contact_ids": [contact.id for contact in contacts],
+        "template_id": template.id
+    }]
+    
+    # Claimed contacts are leased; users without a default template are not claimed
+    db_session.expire_all()
+    for contact in db_session.query(Contact).filter(Contact.user_id == user.id):
+        assert contact.follow_up_date > datetime.utcnow()
+    
+    scheduler_service.check_pending_followups()
+    assert len(dispatched) == 1
+
+
+def test_successful_send_clears_follow_up(db_session, dispatched, smtp):
+    """Test the contact state after a follow-up is sent."""
+    user, contacts = create_user_with_due_contacts(db_session, "alice", 1)
+    sent, _ = smtp
+    
+    scheduler_service.check_pending_followups()
+    scheduler_service.send_followup_batch_task(**dispatched[0])
+    
+    assert sent == [contacts[0].email]
+    db_session.expire_all()
+    contact = db_session.get(Contact, contacts[0].id)
+    assert contact.status == ContactStatus.CONTACTED
+    assert contact.follow_up_date is None
+    assert contact.last_contacted_at is not None
+    
+    activity = db_session.query(ActivityLog).filter(ActivityLog.contact_id == contact.id).one()
+    assert activity.activity_type == ActivityType.EMAIL_SENT
+
+
+def test_failed_send_retried_after_lease(db_session, dispatched, smtp):
+    """Test that a failed follow-up stays scheduled and is claimed again once the lease expires."""
+    user, contacts = create_user_with_due_contacts(db_session, "alice", 2)
+    _, failing = smtp
+    failing.add(contacts[0].email)
+    
+    scheduler_service.check_pending_followups()
+    scheduler_service.send_followup_batch_task(**dispatched[0])
+    
+    db_session.expire_all()
+    failed = db_session.get(Contact, contacts[0].id)
+    assert failed.status == ContactStatus.FOLLOW_UP_SCHEDULED
+    assert failed.follow_up_date > datetime.utcnow()
+    
+    # Still within the lease
+    scheduler_service.check_pending_followups()
+    assert len(dispatched) == 1
+    
+    # Once the lease has expired only the failed contact is claimed again
+    db_session.query(Contact).filter(Contact.id == failed.id).update(
+        {Contact.follow_up_date: datetime.utcnow() - timedelta(seconds=1)}
+    )
+    db_session.commit()
+    
+    scheduler_service.check_pending_followups()
+    assert len(dispatched) == 2
+    assert dispatched[1]["contact_ids"] == [failed.id]
+
+
+@pytest.fixture
+def smtp_single(monkeypatch):
+    """Fake single sender recording every address it is asked to send to."""
+    sent = []
+    
+    async def send_email_smtp(to_email, subject, body, **kwargs):
+        sent.append(to_email)
+        return True
+    
+    monkeypatch.setattr(EmailService, "send_email_smtp", staticmethod(send_email_smtp))
+    return sent
+
+
+def test_eta_task_sends_and_clears_follow_up(db_session, smtp_single):
+    """Test the single follow-up task claims a due contact and clears its follow-up."""
+    user, contacts = create_user_with_due_contacts(db_session, "alice", 1)
+    
+    scheduler_service.send_followup_email_task(contacts[0].id, user.id)
+    
+    assert smtp_single == [contacts[0].email]
+    db_session.expire_all()
+    contact = db_session.get(Contact, contacts[0].id)
+    assert contact.status == ContactStatus.CONTACTED
+    assert contact.follow_up_date is None
+
+
+def test_eta_task_skips_claimed_or_cancelled(db_session, dispatched, smtp_single):
+    """Test the single follow-up task does not send what the hourly run claimed or was cancelled."""
+    user, contacts = create_user_with_due_contacts(db_session, "alice", 2)
+    claimed, cancelled = contacts
+    
+    # One follow-up is cancelled, the other claimed by the hourly run, before the eta tasks fire
+    db_session.query(Contact).filter(Contact.id == cancelled.id).update(
+        {Contact.status: ContactStatus.CONTACTED, Contact.follow_up_date: None}
+    )
+    db_session.commit()
+    scheduler_service.check_pending_followups()
+    assert dispatched[0]["contact_ids"] == [claimed.id]
+    
+    scheduler_service.send_followup_email_task(claimed.id, user.id)
+    scheduler_service.send_followup_email_task(cancelled.id, user.id)
+    
+    assert smtp_single == []
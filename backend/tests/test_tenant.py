@@ -0,0 +1,130 @@
+"""
+Test per-user scoping of ORM queries.
+"""
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app.database import Base
+from app.models.user import User
+from app.models.contact import Contact
+from app.models.template import Template
+from app.models.tenant import scope_session_to_user
+
+
+# Test database setup
+TEST_DATABASE_URL = "sqlite+aiosqlite:///./test_tenant.db"
+engine = create_async_engine(TEST_DATABASE_URL)
+TestingSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False, bind=engine)
+
+
+@pytest_asyncio.fixture
+async def users():
+    """Create two users, each with one template and one contact."""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    
+    rows = {}
+    async with TestingSessionLocal() as db:
+        for username in ("alice", "bob"):
+            user = User(email=f"{username}@example.com", username=username, hashed_password="x")
+            db.add(user)
+            await db.flush()
+            template = Template(user_id=user.id, name="Intro", subject="Hello", body="Dear [Name]")
+            contact = Contact(
+                user_id=user.id,
+                name=f"Prof {username}",
+                email=f"prof@{username}.edu",
+                university="University"
+            )
+            db.add_all([template, contact])
+            await db.flush()
+            rows[username] = {"user": user.id, "template": template.id, "contact": contact.id}
+        await db.commit()
+    
+    try:
+        yield rows
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+
+
+def scoped_session(user_id):
+    """Open a session restricted to one user's rows."""
+    db = TestingSessionLocal()
+    scope_session_to_user(db, user_id)
+    return db
+
+
+@pytest.mark.asyncio
+async def test_select_only_returns_own_rows(users):
+    """Test that ORM selects on a scoped session never see another user's rows."""
+    alice, bob = users["alice"], users["bob"]
+    
+    async with scoped_session(alice["user"]) as db:
+        contacts = (await db.execute(select(Contact))).scalars().all()
+        assert [contact.id for contact in contacts] == [alice["contact"]]
+        
+        templates = (await db.execute(select(Template))).scalars().all()
+        assert [template.id for template in templates] == [alice["template"]]
+        
+        # Filtering on another user's ID directly still finds nothing
+        result = await db.execute(select(Contact).where(Contact.id == bob["contact"]))
+        assert result.scalar_one_or_none() is None
+        assert await db.get(Contact, bob["contact"]) is None
+        
+        count = await db.scalar(select(func.count()).select_from(Contact))
+        assert count == 1
+    
+    # Unscoped sessions (Celery, startup) see everything
+    async with TestingSessionLocal() as db:
+        count = await db.scalar(select(func.count()).select_from(Contact))
+        assert count == 2
+
+
+@pytest.mark.asyncio
+async def test_template_contact_outerjoin_is_scoped(users):
+    """Test the select(Template, Contact) outerjoin used by the email endpoints."""
+    alice, bob = users["alice"], users["bob"]
+    
+    async with scoped_session(alice["user"]) as db:
+        # Own template with another user's contact: the contact side is empty
+        result = await db.execute(
+            select(Template, Contact)
+            .outerjoin(Contact, Contact.id == bob["contact"])
+            .where(Template.id == alice["template"])
+        )
+        template, contact = result.one()
+        assert template.id == alice["template"]
+        assert contact is None
+        
+        # Another user's template: no row at all
+        result = await db.execute(
+            select(Template, Contact)
+            .outerjoin(Contact, Contact.id == alice["contact"])
+            .where(Template.id == bob["template"])
+        )
+        assert result.first() is None
+        
+        # Batch form: only own contacts join
+        result = await db.execute(
+            select(Template, Contact)
+            .outerjoin(Contact, Contact.id.in_([alice["contact"], bob["contact"]]))
+            .where(Template.id == alice["template"])
+        )
+        assert [contact.id for _, contact in result.all()] == [alice["contact"]]
+
+
+@pytest.mark.asyncio
+async def test_update_only_touches_own_rows(users):
+    """Test that bulk ORM updates on a scoped session skip other users' rows."""
+    alice, bob = users["alice"], users["bob"]
+    
+    async with scoped_session(alice["user"]) as db:
+        await db.execute(update(Contact).values(notes="touched"))
+        await db.commit()
+    
+    async with TestingSessionLocal() as db:
+        notes = dict((await db.execute(select(Contact.id, Contact.notes))).all())
+        assert notes[alice["contact"]] == "touched"
+        assert notes[bob["contact"]] is None